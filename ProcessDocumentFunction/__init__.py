@@ -1,46 +1,60 @@
 import os
-import json
+import io
 import logging
-import tempfile
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Union, Iterable, Iterator, TYPE_CHECKING
 from datetime import datetime
 import base64
+import binascii
 import uuid
 import re
+import hashlib
+import sqlite3
+import threading
+import time
+import atexit
+from array import array
+from collections import OrderedDict
+from itertools import islice
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
 
+import orjson
 import azure.functions as func
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from openai import AzureOpenAI
 
-# Load environment variables from .env file (for local development)
-try:
-    from dotenv import load_dotenv
-    # Try to load from .env file in the parent directory (for local development)
-    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-    print(f"🔍 Looking for .env file at: {env_path}")
-    if os.path.exists(env_path):
-        load_dotenv(env_path)
-        logging.info(f"✅ Loaded environment variables from {env_path}")
-    else:
-        # Try to load from current directory
-        load_dotenv()
-        logging.info("✅ Loaded environment variables from current directory")
-except ImportError:
-    logging.warning("python-dotenv not available, using system environment variables only")
-except Exception as e:
-    logging.warning(f"Could not load .env file: {e}")
+# The OpenAI, Azure Search, python-docx and pypdf packages are imported where they are first
+# used: importing them up front costs about a second of every cold start
+if TYPE_CHECKING:
+    from azure.search.documents.models import IndexingResult
 
-# Document processing imports
+# Load environment variables from .env file (for local development); deployed
+# production workers get their settings from app configuration and skip the file probes
+IS_PRODUCTION = os.getenv("AZURE_FUNCTIONS_ENVIRONMENT") == "Production"
+if not IS_PRODUCTION:
+    try:
+        from dotenv import load_dotenv
+        # Try to load from .env file in the parent directory (for local development)
+        env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
+        print(f"🔍 Looking for .env file at: {env_path}")
+        if os.path.exists(env_path):
+            load_dotenv(env_path)
+            logging.info(f"✅ Loaded environment variables from {env_path}")
+        else:
+            # Try to load from current directory
+            load_dotenv()
+            logging.info("✅ Loaded environment variables from current directory")
+    except ImportError:
+        logging.warning("python-dotenv not available, using system environment variables only")
+    except Exception as e:
+        logging.warning(f"Could not load .env file: {e}")
+
+# PDFium (native) text extraction is preferred when available; pypdf remains the fallback
 try:
-    from docx import Document
-    import PyPDF2
-    from io import BytesIO
-except ImportError as e:
-    logging.error(f"Missing required packages: {e}")
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging handlers and levels are configured by the Functions host
 logger = logging.getLogger(__name__)
 
 # Configuration from environment variables
@@ -48,55 +62,215 @@ CONFIG = {
     "openai_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT"),
     "openai_key": os.getenv("AZURE_OPENAI_KEY"),
     "openai_api_version": "2024-08-01-preview",
+    # Connect timeout (seconds) for OpenAI requests; kept short so an unreachable endpoint fails fast
+    "openai_connect_timeout": float(os.getenv("AZURE_OPENAI_CONNECT_TIMEOUT", "5")),
     "openai_model_deployment": os.getenv("AZURE_OPENAI_MODEL_DEPLOYMENT", "gpt-4o-cms"),
     "openai_embedding_deployment": os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-ada-002"),
+    # Optional output size for text-embedding-3 deployments (e.g. 512); must match the index vector field
+    "openai_embedding_dimensions": int(os.getenv("AZURE_OPENAI_EMBEDDING_DIMENSIONS", "0")) or None,
     "search_endpoint": os.getenv("AZURE_SEARCH_ENDPOINT"),
     "search_key": os.getenv("AZURE_SEARCH_KEY"),
-    "search_document_index": os.getenv("AZURE_SEARCH_INDEX", "legal-documents-gc")
+    "search_document_index": os.getenv("AZURE_SEARCH_INDEX", "legal-documents-gc"),
+    "openai_embedding_batch_size": int(os.getenv("AZURE_OPENAI_EMBEDDING_BATCH_SIZE", "16")),
+    "openai_max_concurrency": int(os.getenv("AZURE_OPENAI_MAX_CONCURRENCY", "8")),
+    "openai_enrichment_batch_size": int(os.getenv("AZURE_OPENAI_ENRICHMENT_BATCH_SIZE", "5")),
+    "search_upload_batch_size": int(os.getenv("AZURE_SEARCH_UPLOAD_BATCH_SIZE", "500")),
+    "search_upload_concurrency": int(os.getenv("AZURE_SEARCH_UPLOAD_CONCURRENCY", "4")),
+    "search_upload_max_retries": int(os.getenv("AZURE_SEARCH_UPLOAD_MAX_RETRIES", "3")),
+    # Upload embeddings as int8 (Collection(Edm.SByte) field plus an embedding_scale field); off by default
+    "search_embedding_int8": os.getenv("AZURE_SEARCH_EMBEDDING_INT8", "").lower() in ("1", "true", "yes"),
+    "embedding_cache_size": int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+    "embedding_cache_path": os.getenv("EMBEDDING_CACHE_PATH"),
+    "max_upload_bytes": int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024))),
+    # Worker processes for extracting text from large PDFs (0 or 1 keeps extraction in-process)
+    "pdf_extraction_processes": int(os.getenv("PDF_EXTRACTION_PROCESSES", "0")),
+    "pdf_parallel_min_pages": int(os.getenv("PDF_PARALLEL_MIN_PAGES", "20"))
 }
 
-# Log configuration status (without sensitive values)
-logger.info("🔧 Configuration Status:")
-logger.info(f"  - OpenAI Endpoint: {'✅ Set' if CONFIG['openai_endpoint'] else '❌ Missing'}")
-logger.info(f"  - OpenAI Key: {'✅ Set' if CONFIG['openai_key'] else '❌ Missing'}")
-logger.info(f"  - OpenAI Model: {CONFIG['openai_model_deployment']}")
-logger.info(f"  - OpenAI Embedding: {CONFIG['openai_embedding_deployment']}")
-logger.info(f"  - Search Endpoint: {'✅ Set' if CONFIG['search_endpoint'] else '❌ Missing'}")
-logger.info(f"  - Search Key: {'✅ Set' if CONFIG['search_key'] else '❌ Missing'}")
-logger.info(f"  - Search Index: {CONFIG['search_document_index']}")
-
-# Initialize clients (these will be initialized on first use)
+# Log configuration status (without sensitive values) for local runs, or in production when
+# LOG_CONFIG_BANNER is set; this keeps the banner out of every production cold start
+if not IS_PRODUCTION or os.getenv("LOG_CONFIG_BANNER"):
+    logger.info("🔧 Configuration Status:")
+    logger.info(f"  - OpenAI Endpoint: {'✅ Set' if CONFIG['openai_endpoint'] else '❌ Missing'}")
+    logger.info(f"  - OpenAI Key: {'✅ Set' if CONFIG['openai_key'] else '❌ Missing'}")
+    logger.info(f"  - OpenAI Model: {CONFIG['openai_model_deployment']}")
+    logger.info(f"  - OpenAI Embedding: {CONFIG['openai_embedding_deployment']} ({CONFIG['openai_embedding_dimensions'] or 'default'} dimensions)")
+    logger.info(f"  - Search Endpoint: {'✅ Set' if CONFIG['search_endpoint'] else '❌ Missing'}")
+    logger.info(f"  - Search Key: {'✅ Set' if CONFIG['search_key'] else '❌ Missing'}")
+    logger.info(f"  - Search Index: {CONFIG['search_document_index']}")
+    logger.info(f"  - OpenAI Concurrency: {CONFIG['openai_max_concurrency']}")
+    logger.info(f"  - Embedding Cache: {CONFIG['embedding_cache_path'] or 'in-memory only'}")
+    logger.info(f"  - Embedding Upload: {'int8' if CONFIG['search_embedding_int8'] else 'float32'}")
+    logger.info(f"  - Max Upload: {CONFIG['max_upload_bytes']:,} bytes")
+
+# Clients are prewarmed in the background when configured (see below), otherwise created on first use
 openai_client = None
 search_client = None
+client_init_lock = threading.Lock()
+
+# Precompiled patterns and term lists used on every request
+DOCUMENT_KEY_INVALID_CHARS = re.compile(r'[^a-zA-Z0-9_-]')
+CAPITALIZED_WORD = re.compile(r'\b[A-Z][a-z]+\b')
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+# Patterns to detect headings and sections (heading-based chunking), combined into one
+# alternation so each line is matched in a single pass
+HEADING_PATTERN = re.compile(
+    r'^\s*(?:'
+    # Numbered sections: "1.", "1.1", "2.3.4", etc.
+    r'(?:\d+\.)+\s*[A-Z]'
+    # ALL CAPS headings (minimum 3 words, not too long)
+    r'|[A-Z][A-Z\s]{10,80}[A-Z]\s*$'
+    # Roman numerals: "I.", "II.", "III.", etc.
+    r'|[IVX]+\.\s*[A-Z]'
+    # Letters: "A.", "B.", "(a)", "(b)", etc.
+    r'|\(?[A-Za-z]\)?\.\s*[A-Z]'
+    # Section keywords
+    r'|(?i:SECTION|ARTICLE|CHAPTER|PART|EXHIBIT)\s+\d+'
+    # Legal document patterns
+    r'|(?i:WHEREAS|NOW THEREFORE|IN WITNESS WHEREOF)'
+    r')'
+)
+
+LEGAL_TERMS = (
+    "contract", "agreement", "terms", "conditions", "obligations", "rights",
+    "payment", "delivery", "warranty", "liability", "indemnification",
+    "confidentiality", "intellectual property", "termination", "breach",
+    "damages", "jurisdiction", "governing law", "dispute resolution"
+)
+MAX_SIMPLE_KEYPHRASES = 6
+
+# Upper bound on ids fetched when deleting a document's chunks (the service's $skip limit is 100,000)
+SEARCH_MAX_RESULTS = 100000
+
+# Characters of chunk text returned per chunk when full content is not requested
+CHUNK_CONTENT_PREVIEW_CHARS = 200
+
+# Fixed collection fields of every indexed chunk. Kept immutable and copied into a list per
+# document: the Search SDK serializer only emits JSON arrays for lists
+INDEX_GROUPS = ("legal",)
+INDEX_EMPTY_COLLECTION = ()
+
+# Per-document indexing statuses that are worth retrying (conflict, unprocessable, service unavailable)
+SEARCH_RETRYABLE_STATUS_CODES = frozenset((409, 422, 503))
+
+# Content types accepted as a raw file body (options then come from the query string)
+RAW_UPLOAD_CONTENT_TYPES = frozenset((
+    "application/octet-stream",
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "text/plain",
+))
+
+# Uploads are decoded in slices of this many base64 characters (a multiple of 4, ~1 MB decoded)
+BASE64_DECODE_CHUNK_CHARS = 1024 * 1024 // 3 * 4
+
+# Deletes every ASCII whitespace character (string.whitespace) from a base64 slice
+BASE64_WHITESPACE_TABLE = str.maketrans('', '', ' \t\n\r\x0b\x0c')
+
+# Structured output schema for per-chunk enrichment (title, summary and keyphrases in one call)
+CHUNK_ENRICHMENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "chunk_enrichment",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "title": {"type": "string"},
+                            "summary": {"type": "string"},
+                            "keyphrases": {"type": "array", "items": {"type": "string"}}
+                        },
+                        "required": ["id", "title", "summary", "keyphrases"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False
+        }
+    }
+}
+EMBEDDING_DIMENSIONS = CONFIG["openai_embedding_dimensions"] or 1536
+# Identifies the vector space for cached embeddings; a shortened model gets its own cache entries
+EMBEDDING_MODEL_ID = CONFIG["openai_embedding_deployment"]
+if CONFIG["openai_embedding_dimensions"]:
+    EMBEDDING_MODEL_ID += f"@{CONFIG['openai_embedding_dimensions']}"
+EMBEDDING_REQUEST_OPTIONS = {"dimensions": CONFIG["openai_embedding_dimensions"]} if CONFIG["openai_embedding_dimensions"] else {}
+
+# PDFium is not thread-safe; serialize access across concurrent invocations
+pdfium_lock = threading.Lock()
+
+# Process pool for page-parallel PDF extraction, started on first use (see PDF_EXTRACTION_PROCESSES)
+pdf_process_pool = None
+pdf_process_pool_lock = threading.Lock()
+
+# Embedding cache: in-process LRU backed by an optional SQLite file (EMBEDDING_CACHE_PATH)
+embedding_cache = OrderedDict()
+embedding_cache_db = None
+embedding_cache_lock = threading.Lock()
+# The SQLite connection is shared by both caches and used from several threads; every use
+# (including opening it) happens under this one lock
+embedding_cache_db_lock = threading.Lock()
+
+# Chunk enrichment cache (title, summary, keyphrases): same layout, stored in the same SQLite file
+enrichment_cache = OrderedDict()
+enrichment_cache_lock = threading.Lock()
 
 def get_openai_client():
     """Initialize OpenAI client lazily"""
     global openai_client
-    if openai_client is None:
+    if openai_client is not None:
+        return openai_client
+    with client_init_lock:
+        if openai_client is not None:
+            return openai_client
         if not CONFIG["openai_endpoint"]:
             raise ValueError("AZURE_OPENAI_ENDPOINT environment variable is required")
         if not CONFIG["openai_key"]:
             raise ValueError("AZURE_OPENAI_KEY environment variable is required")
         
         logger.info(f"🤖 Initializing OpenAI client with endpoint: {CONFIG['openai_endpoint']}")
+        from openai import AzureOpenAI
         openai_client = AzureOpenAI(
             azure_endpoint=CONFIG["openai_endpoint"],
             api_key=CONFIG["openai_key"],
             api_version=CONFIG["openai_api_version"],
+            timeout=openai_timeout(60)
         )
         logger.info("✅ OpenAI client initialized successfully")
     return openai_client
 
+def openai_timeout(seconds: float):
+    """Request timeout for OpenAI calls: `seconds` overall, with the short configured connect timeout.
+    
+    A bare number would apply to the connect phase too, leaving a worker waiting that long on an unreachable endpoint.
+    """
+    from openai import Timeout
+    return Timeout(seconds, connect=CONFIG["openai_connect_timeout"])
+
 def get_search_client():
     """Initialize Search client lazily"""
     global search_client
-    if search_client is None:
+    if search_client is not None:
+        return search_client
+    with client_init_lock:
+        if search_client is not None:
+            return search_client
         if not CONFIG["search_endpoint"]:
             raise ValueError("AZURE_SEARCH_ENDPOINT environment variable is required")
         if not CONFIG["search_key"]:
             raise ValueError("AZURE_SEARCH_KEY environment variable is required")
         
         logger.info(f"🔍 Initializing Search client with endpoint: {CONFIG['search_endpoint']}")
+        from azure.core.credentials import AzureKeyCredential
+        from azure.search.documents import SearchClient
         search_client = SearchClient(
             endpoint=CONFIG["search_endpoint"],
             index_name=CONFIG["search_document_index"],
@@ -105,29 +279,322 @@ def get_search_client():
         logger.info("✅ Search client initialized successfully")
     return search_client
 
+def prewarm_clients() -> None:
+    """Import the SDKs and build the configured clients off the request path"""
+    try:
+        if CONFIG["openai_endpoint"] and CONFIG["openai_key"]:
+            get_openai_client()
+        if CONFIG["search_endpoint"] and CONFIG["search_key"]:
+            get_search_client()
+    except Exception as e:
+        logger.warning("Client prewarm failed: %s", e)
+
+def close_clients() -> None:
+    """Close the cached clients' connection pools when the worker shuts down"""
+    for client in (openai_client, search_client):
+        if client is not None:
+            try:
+                client.close()
+            except Exception as e:
+                logger.debug("Client close failed: %s", e)
+
+atexit.register(close_clients)
+
+# Functions imports this module once per worker: start building the clients right away, in the
+# background, so import returns quickly and the first request usually finds them ready. Missing
+# settings keep the lazy path, which raises the configuration error when a request needs the
+# client. PDF extraction worker processes never call the services and skip this.
+if multiprocessing.parent_process() is None:
+    threading.Thread(target=prewarm_clients, name="client-prewarm", daemon=True).start()
+
+def decode_base64_content(file_content: str) -> io.BytesIO:
+    """Decode a base64 upload slice by slice into an in-memory file.
+    
+    Avoids materializing an ASCII copy of the whole base64 string next to the decoded bytes.
+    Line-wrapped input is streamed too: all ASCII whitespace is dropped per slice, before
+    alignment, and any partial 4-character group is carried over to the next slice.
+    """
+    buffer = io.BytesIO()
+    pending = ''
+    for start in range(0, len(file_content), BASE64_DECODE_CHUNK_CHARS):
+        piece = file_content[start:start + BASE64_DECODE_CHUNK_CHARS]
+        piece = pending + piece.translate(BASE64_WHITESPACE_TABLE)
+        usable = len(piece) - len(piece) % 4
+        buffer.write(binascii.a2b_base64(piece[:usable]))
+        pending = piece[usable:]
+    if pending:
+        # Raises binascii.Error (incorrect padding) just like a whole-string decode would
+        buffer.write(binascii.a2b_base64(pending))
+    buffer.seek(0)
+    return buffer
+
+def parse_bool_param(value: str, default: bool) -> bool:
+    """Read a query-string flag ('1', 'true' or 'yes' are true); a missing flag means `default`"""
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
 def sanitize_document_key(filename: str) -> str:
     """Sanitize filename for use as document key"""
     base_name = os.path.splitext(filename)[0]
-    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', base_name)
+    sanitized = DOCUMENT_KEY_INVALID_CHARS.sub('_', base_name)
     return sanitized.lower()
 
-def generate_text_embedding(text: str) -> List[float]:
-    """Generate text embedding using Azure OpenAI"""
+def get_embedding_cache_db():
+    """Open the persistent embedding cache lazily (None when not configured).
+    
+    The caller holds embedding_cache_db_lock for as long as it uses the connection.
+    """
+    global embedding_cache_db
+    if embedding_cache_db is None and CONFIG["embedding_cache_path"]:
+        conn = sqlite3.connect(CONFIG["embedding_cache_path"], check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunk_enrichments (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        conn.commit()
+        embedding_cache_db = conn
+        logger.info(f"💾 Embedding cache opened at {CONFIG['embedding_cache_path']}")
+    return embedding_cache_db
+
+def embedding_cache_key(text: str) -> str:
+    """Cache key for an embedding: hash of the embedding model (and dimensions) and normalized text"""
+    return hashlib.sha256(f"{EMBEDDING_MODEL_ID}\n{text.strip()}".encode('utf-8')).hexdigest()
+
+def _remember(cache: OrderedDict, key: str, value: Any) -> None:
+    """Store a value in an in-process LRU (caller holds its lock)"""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > CONFIG["embedding_cache_size"]:
+        cache.popitem(last=False)
+
+def embedding_cache_get(key: str):
+    """Return a cached embedding or None"""
+    with embedding_cache_lock:
+        embedding = embedding_cache.get(key)
+        if embedding is not None:
+            embedding_cache.move_to_end(key)
+            return embedding
+        
+        try:
+            with embedding_cache_db_lock:
+                db = get_embedding_cache_db()
+                if db is None:
+                    return None
+                row = db.execute("SELECT vector FROM embeddings WHERE cache_key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache lookup failed: %s", e)
+            return None
+        
+        if row is None:
+            return None
+        
+        # Vectors are persisted as packed float32
+        embedding = array('f')
+        embedding.frombytes(row[0])
+        _remember(embedding_cache, key, embedding)
+        return embedding
+
+def embedding_cache_put_many(items: List[tuple]) -> None:
+    """Cache (key, embedding) pairs in memory and, when configured, on disk"""
+    with embedding_cache_lock:
+        for key, embedding in items:
+            _remember(embedding_cache, key, embedding)
+        
+        try:
+            with embedding_cache_db_lock:
+                db = get_embedding_cache_db()
+                if db is None:
+                    return
+                db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (cache_key, model, vector) VALUES (?, ?, ?)",
+                    [(key, EMBEDDING_MODEL_ID, embedding.tobytes()) for key, embedding in items]
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache write failed: %s", e)
+
+def enrichment_cache_key(text: str) -> str:
+    """Cache key for a chunk enrichment: hash of the chat deployment and normalized text"""
+    return hashlib.sha256(f"{CONFIG['openai_model_deployment']}\nchunk_enrichment\n{text.strip()}".encode('utf-8')).hexdigest()
+
+def enrichment_cache_get(key: str):
+    """Return a cached chunk enrichment dict or None"""
+    with enrichment_cache_lock:
+        enrichment = enrichment_cache.get(key)
+        if enrichment is not None:
+            enrichment_cache.move_to_end(key)
+            return enrichment
+        
+        try:
+            with embedding_cache_db_lock:
+                db = get_embedding_cache_db()
+                if db is None:
+                    return None
+                row = db.execute("SELECT payload FROM chunk_enrichments WHERE cache_key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Enrichment cache lookup failed: %s", e)
+            return None
+        
+        if row is None:
+            return None
+        
+        enrichment = orjson.loads(row[0])
+        _remember(enrichment_cache, key, enrichment)
+        return enrichment
+
+def enrichment_cache_put_many(items: List[tuple]) -> None:
+    """Cache (key, enrichment) pairs in memory and, when configured, on disk"""
+    if not items:
+        return
+    with enrichment_cache_lock:
+        for key, enrichment in items:
+            _remember(enrichment_cache, key, enrichment)
+        
+        try:
+            with embedding_cache_db_lock:
+                db = get_embedding_cache_db()
+                if db is None:
+                    return
+                db.executemany(
+                    "INSERT OR REPLACE INTO chunk_enrichments (cache_key, model, payload) VALUES (?, ?, ?)",
+                    [(key, CONFIG["openai_model_deployment"], orjson.dumps(enrichment)) for key, enrichment in items]
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning("Enrichment cache write failed: %s", e)
+
+def embed_text_batch(texts: List[str], keys: List[str]) -> List[array]:
+    """Embed one batch of texts with a single Azure OpenAI request and cache the vectors.
+    
+    A failed request yields zero vectors (which are not cached) so the batch never fails the document.
+    """
     try:
         client = get_openai_client()
         response = client.embeddings.create(
-            input=text,
-            model=CONFIG["openai_embedding_deployment"]
+            input=texts,
+            model=CONFIG["openai_embedding_deployment"],
+            encoding_format="base64",
+            **EMBEDDING_REQUEST_OPTIONS
+        )
+        # Vectors arrive as base64-encoded float32 and are unpacked straight into arrays, never
+        # materializing a Python float per dimension. Results carry their input index; keep them
+        # aligned with the batch order.
+        fresh = [array('f', base64.b64decode(item.embedding)) for item in sorted(response.data, key=lambda item: item.index)]
+        embedding_cache_put_many(list(zip(keys, fresh)))
+        return fresh
+    except Exception as e:
+        logger.error("Error generating embeddings for a batch of %d texts: %s", len(texts), e)
+        return [array('f', [0.0]) * EMBEDDING_DIMENSIONS for _ in texts]  # Return dummy embeddings (not cached)
+
+def generate_text_embeddings(texts: List[str], executor: ThreadPoolExecutor = None) -> List[array]:
+    """Generate text embeddings for many texts using batched Azure OpenAI requests.
+    
+    Vectors are returned as packed float32 arrays (the index stores Edm.Single anyway),
+    which take a fraction of the memory of Python float lists; convert with
+    to_search_document() at the upload boundary.
+    
+    With an `executor`, every batch is submitted to it so the requests are in flight together;
+    without one they are sent one after another. Do not call this from a task running on that
+    same executor.
+    """
+    keys = [embedding_cache_key(text) for text in texts]
+    embeddings = [embedding_cache_get(key) for key in keys]
+    
+    # Only cache misses are sent to Azure OpenAI
+    misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if len(misses) < len(texts):
+        logger.info(f"♻️ Embedding cache hits: {len(texts) - len(misses)}/{len(texts)}")
+    
+    batch_size = CONFIG["openai_embedding_batch_size"]
+    batches = [misses[start:start + batch_size] for start in range(0, len(misses), batch_size)]
+    if executor is None:
+        results = (embed_text_batch([texts[i] for i in batch], [keys[i] for i in batch]) for batch in batches)
+    else:
+        futures = [executor.submit(embed_text_batch, [texts[i] for i in batch], [keys[i] for i in batch]) for batch in batches]
+        results = (future.result() for future in futures)
+    
+    # Put each batch's vectors back at their input positions
+    for batch, fresh in zip(batches, results):
+        for i, embedding in zip(batch, fresh):
+            embeddings[i] = embedding
+    
+    return embeddings
+
+def generate_text_embedding(text: str) -> array:
+    """Generate text embedding using Azure OpenAI"""
+    return generate_text_embeddings([text])[0]
+
+def refine_chunk_with_openai(raw_chunk: str, theme: str, max_chunk_size: int) -> str:
+    """Use OpenAI to clean up one chunk's boundaries; returns the original chunk if refinement fails"""
+    refinement_prompt = f'''
+You are a document processing expert. Clean up and optimize this text chunk for better readability and completeness.
+
+Tasks:
+1. Ensure the chunk starts and ends at natural sentence boundaries
+2. If the chunk is cut off mid-sentence, either include the complete sentence or exclude the incomplete part
+3. Remove any orphaned fragments
+4. Ensure the chunk is coherent and self-contained
+5. Preserve important formatting and structure
+
+Theme for this chunk: {theme}
+
+Original chunk:
+{raw_chunk}
+
+Return ONLY the cleaned, optimized chunk text with no additional formatting or explanations.
+'''
+
+    try:
+        client = get_openai_client()
+        refinement_response = client.chat.completions.create(
+            model=CONFIG["openai_model_deployment"],
+            messages=[{"role": "user", "content": refinement_prompt}],
+            temperature=0.1,
+            # The refined chunk is about as long as the original; at several characters per token,
+            # half its character count leaves ample room for the rewrite
+            max_tokens=min(1500, len(raw_chunk) // 2 + 100),
+            timeout=openai_timeout(30)  # Add timeout to prevent hanging
         )
-        return response.data[0].embedding
+        
+        # A refinement cut off by the token cap would silently drop content
+        if refinement_response.choices[0].finish_reason == "length":
+            return raw_chunk
+        
+        refined_chunk = refinement_response.choices[0].message.content.strip()
+        
+        # Validation: ensure the refined chunk is reasonable
+        if (len(refined_chunk) > 50 and 
+            len(refined_chunk) <= max_chunk_size * 1.2 and
+            not refined_chunk.startswith("I ") and  # Avoid AI meta-responses
+            not refined_chunk.startswith("The chunk")):
+            return refined_chunk
+        
+        # Use original chunk if refinement failed
+        return raw_chunk
+        
     except Exception as e:
-        logger.error(f"Error generating embedding: {str(e)}")
-        return [0.0] * 1536  # Return dummy embedding
+        logger.warning("Chunk refinement failed: %s, using original", e)
+        return raw_chunk
 
 def intelligent_chunk_with_openai(document_text: str, document_type: str = "legal", max_chunk_size: int = 1000) -> List[str]:
     """Use OpenAI to intelligently determine optimal chunk boundaries based on semantic meaning"""
     
     # First, let OpenAI analyze the document structure and suggest chunking strategy
+    # (the prompt only needs the opening of the document; slice it once)
+    document_preview = document_text[:3000]
+    if len(document_text) > 3000:
+        document_preview += '...'
     analysis_prompt = f'''
 You are an expert document analyst. Analyze this {document_type} document and determine the optimal way to break it into semantic chunks.
 
@@ -140,7 +607,7 @@ Consider:
 - Maximum chunk size of approximately {max_chunk_size} characters
 
 Document to analyze:
-{document_text[:3000]}{'...' if len(document_text) > 3000 else ''}
+{document_preview}
 
 Return a JSON object with:
 1. "strategy": brief description of chunking approach
@@ -165,10 +632,10 @@ Example output:
             response_format={"type": "json_object"},
             temperature=0.1,
             max_tokens=800,
-            timeout=45  # Longer timeout for analysis
+            timeout=openai_timeout(45)  # Longer timeout for analysis
         )
         
-        analysis = json.loads(analysis_response.choices[0].message.content)
+        analysis = orjson.loads(analysis_response.choices[0].message.content)
         logger.info(f"🧠 AI Chunking Strategy: {analysis.get('strategy', 'Standard approach')}")
         
         # Use AI-suggested boundaries to create initial chunks
@@ -181,57 +648,22 @@ Example output:
             boundaries.append(len(document_text))
         
         # Create chunks based on AI-suggested boundaries
-        chunks = []
+        raw_chunks = []
         for i in range(len(boundaries) - 1):
             start = boundaries[i]
             end = min(boundaries[i + 1], len(document_text))
             
             if end > start:
-                raw_chunk = document_text[start:end].strip()
-                
-                # Now use OpenAI to refine and clean up each chunk
-                refinement_prompt = f'''
-You are a document processing expert. Clean up and optimize this text chunk for better readability and completeness.
-
-Tasks:
-1. Ensure the chunk starts and ends at natural sentence boundaries
-2. If the chunk is cut off mid-sentence, either include the complete sentence or exclude the incomplete part
-3. Remove any orphaned fragments
-4. Ensure the chunk is coherent and self-contained
-5. Preserve important formatting and structure
-
-Theme for this chunk: {themes[i] if i < len(themes) else 'General content'}
-
-Original chunk:
-{raw_chunk}
-
-Return ONLY the cleaned, optimized chunk text with no additional formatting or explanations.
-'''
-
-                try:
-                    refinement_response = client.chat.completions.create(
-                        model=CONFIG["openai_model_deployment"],
-                        messages=[{"role": "user", "content": refinement_prompt}],
-                        temperature=0.1,
-                        max_tokens=min(1500, len(raw_chunk) + 200),
-                        timeout=30  # Add timeout to prevent hanging
-                    )
-                    
-                    refined_chunk = refinement_response.choices[0].message.content.strip()
-                    
-                    # Validation: ensure the refined chunk is reasonable
-                    if (len(refined_chunk) > 50 and 
-                        len(refined_chunk) <= max_chunk_size * 1.2 and
-                        not refined_chunk.startswith("I ") and  # Avoid AI meta-responses
-                        not refined_chunk.startswith("The chunk")):
-                        chunks.append(refined_chunk)
-                    else:
-                        # Use original chunk if refinement failed
-                        chunks.append(raw_chunk)
-                        
-                except Exception as e:
-                    logger.warning(f"Chunk refinement failed: {e}, using original")
-                    chunks.append(raw_chunk)
+                theme = themes[i] if i < len(themes) else 'General content'
+                raw_chunks.append((document_text[start:end].strip(), theme))
+        
+        # Refinement calls are independent; run them concurrently, once per distinct (chunk, theme)
+        # pair so repeated boilerplate is refined a single time, and keep chunk order
+        unique_raw_chunks = list(dict.fromkeys(raw_chunks))
+        with ThreadPoolExecutor(max_workers=CONFIG["openai_max_concurrency"]) as executor:
+            refined_chunks = dict(zip(unique_raw_chunks, executor.map(
+                lambda raw: refine_chunk_with_openai(raw[0], raw[1], max_chunk_size), unique_raw_chunks)))
+        chunks = [refined_chunks[raw] for raw in raw_chunks]
         
         # Final validation and cleanup
         final_chunks = []
@@ -249,10 +681,8 @@ Return ONLY the cleaned, optimized chunk text with no additional formatting or e
 
 def fallback_sentence_chunking(document_text: str, max_chunk_size: int = 1000) -> List[str]:
     """Fallback method: Split by sentences when AI chunking fails"""
-    import re
-    
     # Split into sentences
-    sentences = re.split(r'(?<=[.!?])\s+', document_text)
+    sentences = SENTENCE_BOUNDARY.split(document_text)
     
     chunks = []
     current_chunk = []
@@ -274,9 +704,6 @@ def fallback_sentence_chunking(document_text: str, max_chunk_size: int = 1000) -
     if current_chunk:
         chunks.append(' '.join(current_chunk))
     
-    # Validate content preservation (returns metrics but we don't need them here)
-    validate_content_preservation(document_text, chunks, "sentence-based chunking")
-    
     return chunks
 
 def validate_content_preservation(original_text: str, chunks: List[str], method_name: str) -> Dict[str, Any]:
@@ -286,18 +713,23 @@ def validate_content_preservation(original_text: str, chunks: List[str], method_
     original_length = len(original_text)
     original_words = len(original_text.split())
     
-    # Calculate chunked content metrics  
-    combined_chunks = ' '.join(chunks)
-    combined_length = len(combined_chunks)
-    combined_words = len(combined_chunks.split())
+    # Calculate chunked content metrics in one pass, as if the chunks were joined with single
+    # spaces, without building the joined copy of the whole document
+    total_chunk_chars = 0
+    combined_words = 0
+    empty_chunks = []
+    for i, chunk in enumerate(chunks):
+        total_chunk_chars += len(chunk)
+        chunk_words = len(chunk.split())
+        if not chunk_words:
+            empty_chunks.append(i)
+        combined_words += chunk_words
+    combined_length = total_chunk_chars + max(len(chunks) - 1, 0)
     
     # Calculate content preservation ratio
     length_ratio = combined_length / original_length if original_length > 0 else 0
     word_ratio = combined_words / original_words if original_words > 0 else 0
     
-    # Additional validation: Check for significant content overlap or gaps
-    total_chunk_chars = sum(len(chunk) for chunk in chunks)
-    
     # Log validation results
     logger.info(f"📊 Content Validation for {method_name}:")
     logger.info(f"   Original: {original_length:,} chars, {original_words:,} words")
@@ -317,7 +749,6 @@ def validate_content_preservation(original_text: str, chunks: List[str], method_
         issues.append(f"Content expansion: {combined_length - original_length} extra chars")
     
     # Check for empty chunks
-    empty_chunks = [i for i, chunk in enumerate(chunks) if not chunk.strip()]
     if empty_chunks:
         issues.append(f"Empty chunks found at positions: {empty_chunks}")
     
@@ -331,7 +762,7 @@ def validate_content_preservation(original_text: str, chunks: List[str], method_
     else:
         logger.warning(f"⚠️ Content integrity issues detected in {method_name}:")
         for issue in issues:
-            logger.warning(f"   - {issue}")
+            logger.warning("   - %s", issue)
         
         if acceptable:
             logger.info(f"📋 Issues within acceptable range for {method_name}")
@@ -354,28 +785,11 @@ def validate_content_preservation(original_text: str, chunks: List[str], method_
 
 def heading_based_chunking(document_text: str) -> List[str]:
     """Chunk document based on headings and sections"""
-    import re
-    
     # Split document into lines for analysis
     lines = document_text.split('\n')
     chunks = []
     current_chunk_lines = []
-    
-    # Patterns to detect headings and sections
-    heading_patterns = [
-        # Numbered sections: "1.", "1.1", "2.3.4", etc.
-        re.compile(r'^\s*(\d+\.)+\s*[A-Z]'),
-        # ALL CAPS headings (minimum 3 words, not too long)
-        re.compile(r'^\s*[A-Z][A-Z\s]{10,80}[A-Z]\s*$'),
-        # Roman numerals: "I.", "II.", "III.", etc.
-        re.compile(r'^\s*[IVX]+\.\s*[A-Z]'),
-        # Letters: "A.", "B.", "(a)", "(b)", etc.
-        re.compile(r'^\s*\(?[A-Za-z]\)?\.\s*[A-Z]'),
-        # Section keywords
-        re.compile(r'^\s*(SECTION|ARTICLE|CHAPTER|PART|EXHIBIT)\s+\d+', re.IGNORECASE),
-        # Legal document patterns
-        re.compile(r'^\s*(WHEREAS|NOW THEREFORE|IN WITNESS WHEREOF)', re.IGNORECASE),
-    ]
+    current_size = 0  # Running total of len() over current_chunk_lines
     
     def is_heading(line: str) -> bool:
         """Check if a line is likely a heading"""
@@ -390,9 +804,8 @@ def heading_based_chunking(document_text: str) -> List[str]:
             return False
             
         # Check against heading patterns
-        for pattern in heading_patterns:
-            if pattern.match(line):
-                return True
+        if HEADING_PATTERN.match(line):
+            return True
                 
         # Additional heuristics for headings
         # Short lines that are mostly uppercase
@@ -401,14 +814,13 @@ def heading_based_chunking(document_text: str) -> List[str]:
             
         return False
     
-    def should_start_new_chunk(line: str, current_chunk_lines: List[str]) -> bool:
+    def should_start_new_chunk(line: str, current_size: int) -> bool:
         """Determine if we should start a new chunk"""
         # Always start new chunk on headings
         if is_heading(line):
             return True
             
         # Don't split if current chunk is too small (less than 200 chars)
-        current_size = sum(len(l) for l in current_chunk_lines)
         if current_size < 200:
             return False
             
@@ -428,16 +840,18 @@ def heading_based_chunking(document_text: str) -> List[str]:
             continue
             
         # Check if we should start a new chunk
-        if current_chunk_lines and should_start_new_chunk(line, current_chunk_lines):
+        if current_chunk_lines and should_start_new_chunk(line, current_size):
             # Finalize current chunk
             chunk_text = '\n'.join(current_chunk_lines).strip()
             if chunk_text:
                 chunks.append(chunk_text)
             current_chunk_lines = []
+            current_size = 0
         
         # Add line to current chunk
         if line:  # Only add non-empty lines
             current_chunk_lines.append(line)
+            current_size += len(line)
     
     # Add final chunk
     if current_chunk_lines:
@@ -447,129 +861,160 @@ def heading_based_chunking(document_text: str) -> List[str]:
     
     logger.info(f"✅ Created {len(chunks)} heading-based chunks")
     
-    # Validate content preservation (returns metrics but we don't need them here)
-    validate_content_preservation(document_text, chunks, "heading-based chunking")
-    
     # Log chunk details for debugging
-    for i, chunk in enumerate(chunks[:5]):  # Show first 5 chunks
-        logger.info(f"   Chunk {i+1}: {len(chunk)} chars - {chunk[:60]}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, chunk in enumerate(chunks[:5]):  # Show first 5 chunks
+            logger.debug("   Chunk %d: %d chars - %s...", i + 1, len(chunk), chunk[:60])
     
     return chunks
 
 def extract_simple_keyphrases(text: str) -> List[str]:
     """Fallback method: Simple keyword extraction"""
-    legal_terms = [
-        "contract", "agreement", "terms", "conditions", "obligations", "rights",
-        "payment", "delivery", "warranty", "liability", "indemnification",
-        "confidentiality", "intellectual property", "termination", "breach",
-        "damages", "jurisdiction", "governing law", "dispute resolution"
-    ]
-    
     found_terms = []
+    # A single lowercase copy per call keeps the term checks as C-level substring searches;
+    # case-insensitive regex scanning over the original text is far slower
     text_lower = text.lower()
     
-    for term in legal_terms:
+    for term in LEGAL_TERMS:
         if term in text_lower:
             found_terms.append(term)
+            if len(found_terms) == MAX_SIMPLE_KEYPHRASES:
+                # Later terms and capitalized words could never make the cut
+                return found_terms
     
-    # Add capitalized words
-    words = re.findall(r'\b[A-Z][a-z]+\b', text)
-    found_terms.extend(words[:3])
+    # Add capitalized words, scanning only as far as needed
+    needed = min(3, MAX_SIMPLE_KEYPHRASES - len(found_terms))
+    found_terms.extend(match.group() for match in islice(CAPITALIZED_WORD.finditer(text), needed))
     
-    return found_terms[:6] if found_terms else ["document", "content"]
+    return found_terms if found_terms else ["document", "content"]
 
-def extract_keyphrases_with_openai(text: str, document_type: str = "legal") -> List[str]:
-    """Use OpenAI to intelligently extract key phrases from text"""
-    
-    prompt = f'''
-You are an expert at extracting key phrases from {document_type} documents. 
+def fallback_chunk_summary(chunk_text: str) -> str:
+    """Local summary used when OpenAI does not return one: the first sentence or a prefix"""
+    sentences = chunk_text.split('. ')
+    return sentences[0] + "." if len(sentences) > 1 else chunk_text[:100] + "..."
 
-Analyze the provided text and extract 5-8 key phrases that are most important for search and categorization. Focus on:
+def enrich_chunks_with_openai(indexed_chunks: List[tuple], document_type: str = "legal") -> List[Dict]:
+    """Use one OpenAI call to create a title, summary and key phrases for each of a group of (index, chunk) pairs.
+    
+    Previously enriched chunk texts are served from the enrichment cache and left out of the request.
+    """
+    keys = [enrichment_cache_key(chunk_text) for _, chunk_text in indexed_chunks]
+    cached = [enrichment_cache_get(key) for key in keys]
+    pending = [(i, chunk_text) for (i, chunk_text), enrichment in zip(indexed_chunks, cached) if enrichment is None]
+    
+    results = {}
+    if pending:
+        snippets = "\n\n".join(f"[{i}] {chunk_text[:2000]}" for i, chunk_text in pending)
+        enrichment_prompt = f'''
+You are an expert at analyzing {document_type} documents for search and categorization.
 
-For Legal Documents:
-- Legal terms and concepts
-- Important names, entities, companies
-- Dates, deadlines, time periods
-- Contract clauses and obligations
-- Monetary amounts or percentages
-- Jurisdictions or legal references
+For each numbered text snippet below, provide:
+- "title": a short descriptive title (3-6 words)
+- "summary": a concise 1-2 sentence summary
+- "keyphrases": 5-8 key phrases most important for search, such as legal terms and concepts, important names,
+  entities and companies, dates and deadlines, contract clauses and obligations, monetary amounts or percentages,
+  and jurisdictions or legal references
 
-For General Documents:
-- Main topics and themes
-- Important entities or names
-- Key concepts and terminology
-- Action items or requirements
-- Technical terms specific to the domain
+Return a JSON object with a "results" array containing one entry per snippet, using the snippet number as "id":
+{{"results": [{{"id": 1, "title": "Payment Terms and Schedule", "summary": "...", "keyphrases": ["phrase1", "phrase2"]}}]}}
 
-Return ONLY a simple JSON array of key phrases as strings. No explanations.
+Snippets:
+{snippets}
+'''
 
-Example output format:
-["phrase1", "phrase2", "phrase3", "phrase4", "phrase5"]
+        try:
+            client = get_openai_client()
+            enrichment_response = client.chat.completions.create(
+                model=CONFIG["openai_model_deployment"],
+                messages=[{"role": "user", "content": enrichment_prompt}],
+                response_format=CHUNK_ENRICHMENT_RESPONSE_FORMAT,
+                max_tokens=200 * len(pending) + 50,
+                temperature=0.1,
+                timeout=openai_timeout(60)
+            )
+            # The schema guarantees {"results": [{"id", "title", "summary", "keyphrases"}, ...]}
+            for entry in orjson.loads(enrichment_response.choices[0].message.content)["results"]:
+                results[entry["id"]] = entry
+        except Exception as e:
+            logger.warning("Failed to generate AI chunk enrichment: %s", e)
+    
+    # Chunks missing from the response fall back to local title, summary and key phrases;
+    # only complete AI results are cached so fallbacks are retried next time
+    enrichments = []
+    fresh = []
+    for (i, chunk_text), key, enrichment in zip(indexed_chunks, keys, cached):
+        if enrichment is None:
+            entry = results.get(i, {})
+            title = entry.get("title", "").strip().strip('"')
+            summary = entry.get("summary", "").strip()
+            keyphrases = [phrase.strip() for phrase in entry.get("keyphrases", [])[:8] if phrase.strip()]
+            if title and summary and keyphrases:
+                enrichment = {"title": title, "summary": summary, "keyphrases": keyphrases}
+                fresh.append((key, enrichment))
+            else:
+                enrichment = {
+                    "title": title or f"Section {i}",
+                    "summary": summary or fallback_chunk_summary(chunk_text),
+                    "keyphrases": keyphrases or extract_simple_keyphrases(chunk_text)
+                }
+        enrichments.append(enrichment)
+    
+    enrichment_cache_put_many(fresh)
+    return enrichments
 
-Text to analyze:
-{text[:2000]}
-'''
+@lru_cache(maxsize=16)
+def _open_docx(path: str, size: int, mtime_ns: int):
+    """Parse a .docx file once per (path, size, mtime); the stat fields invalidate stale entries"""
+    from docx import Document
+    return Document(path)
 
-    try:
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model=CONFIG["openai_model_deployment"],
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.2,
-            max_tokens=200,
-            timeout=30  # Add timeout
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        
-        if isinstance(result, list):
-            keyphrases = result
-        elif isinstance(result, dict):
-            keyphrases = result.get('keyphrases', result.get('phrases', result.get('key_phrases', [])))
-            if not keyphrases and len(result) == 1:
-                keyphrases = list(result.values())[0]
-        else:
-            keyphrases = []
-        
-        if not isinstance(keyphrases, list):
-            keyphrases = []
-            
-        cleaned_phrases = []
-        for phrase in keyphrases[:8]:
-            if isinstance(phrase, str) and phrase.strip():
-                cleaned_phrases.append(phrase.strip())
-        
-        return cleaned_phrases if cleaned_phrases else ["document", "content"]
-        
-    except Exception as e:
-        logger.error(f"Error extracting keyphrases with OpenAI: {str(e)}")
-        return extract_simple_keyphrases(text)
+def open_docx(source: Union[str, BinaryIO]):
+    """Open a Word document, reusing the parsed tree for unchanged files on disk"""
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        return _open_docx(os.fspath(source), stat.st_size, stat.st_mtime_ns)
+    from docx import Document
+    return Document(source)
 
-def extract_true_paragraphs_method2(file_path: str) -> str:
+def extract_true_paragraphs_method2(source: Union[str, BinaryIO]) -> str:
     """Method 2: Use paragraph styles and formatting to identify true paragraphs"""
     try:
-        doc = Document(file_path)
+        from docx.enum.style import WD_STYLE_TYPE
+        from docx.oxml.ns import qn
+        doc = open_docx(source)
+        
+        # Resolve heading styles once by styleId instead of a style lookup per paragraph.
+        # Like python-docx, a missing or unknown styleId means the default paragraph style.
+        heading_prefixes = ('Heading', 'Title')
+        paragraph_style_ids = set()
+        heading_style_ids = set()
+        for style in doc.styles:
+            if style.type == WD_STYLE_TYPE.PARAGRAPH:
+                paragraph_style_ids.add(style.style_id)
+                if (style.name or '').startswith(heading_prefixes):
+                    heading_style_ids.add(style.style_id)
+        default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+        default_is_heading = default_style is not None and (default_style.name or '').startswith(heading_prefixes)
         
         paragraphs = []
         current_paragraph = []
         
-        for para in doc.paragraphs:
-            text = para.text.strip()
+        # Walk the body's top-level <w:p> elements directly (same paragraphs as doc.paragraphs,
+        # without building a Paragraph proxy for each)
+        for p in doc.element.body.iterchildren(qn('w:p')):
+            text = p.text.strip()
             
             if not text:
                 continue
-                
-            is_new_paragraph = (
-                para.style.name.startswith(('Heading', 'Title')) or
-                len(current_paragraph) == 0
-            )
+            
+            style_id = p.style
+            is_heading = style_id in heading_style_ids if style_id in paragraph_style_ids else default_is_heading
+            is_new_paragraph = is_heading or len(current_paragraph) == 0
             
             if is_new_paragraph and current_paragraph:
                 paragraphs.append(' '.join(current_paragraph))
-                current_paragraph = [text]
-            else:
-                current_paragraph.append(text)
+                current_paragraph.clear()  # Reuse the accumulator; join already copied its contents
+            current_paragraph.append(text)
         
         if current_paragraph:
             paragraphs.append(' '.join(current_paragraph))
@@ -580,38 +1025,140 @@ def extract_true_paragraphs_method2(file_path: str) -> str:
         logger.error(f"Error in paragraph extraction: {str(e)}")
         return None
 
-def process_document_content(file_path: str, file_extension: str) -> str:
-    """Extract document content with properly reconstructed paragraphs"""
+def get_pdf_process_pool() -> ProcessPoolExecutor:
+    """Start the PDF extraction process pool lazily; it is reused for the life of the worker"""
+    global pdf_process_pool
+    with pdf_process_pool_lock:
+        if pdf_process_pool is None:
+            # Spawned (not forked) workers: forking a process with live client and PDFium threads is unsafe
+            pdf_process_pool = ProcessPoolExecutor(
+                max_workers=CONFIG["pdf_extraction_processes"],
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"🧵 Started {CONFIG['pdf_extraction_processes']} PDF extraction processes")
+    return pdf_process_pool
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    """Return the number of pages in an in-memory PDF"""
+    if pdfium is not None:
+        with pdfium_lock:
+            pdf = pdfium.PdfDocument(pdf_bytes)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    from pypdf import PdfReader
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+def extract_pdf_page_range(pdf_bytes: bytes, start: int, stop: int) -> List[str]:
+    """Extract raw text for pages [start, stop) of an in-memory PDF (runs in a worker process)"""
+    if pdfium is not None:
+        page_texts = []
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            for index in range(start, stop):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                page_texts.append(textpage.get_text_bounded())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+        return page_texts
+    
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    return [reader.pages[index].extract_text() or '' for index in range(start, stop)]
+
+def iter_pdf_page_texts(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """Yield raw text for each PDF page in turn, using PDFium when installed.
+    
+    With PDF_EXTRACTION_PROCESSES > 1, documents of at least PDF_PARALLEL_MIN_PAGES pages are split
+    into contiguous page ranges extracted by the process pool; pages are still yielded in order.
+    """
+    if CONFIG["pdf_extraction_processes"] > 1:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as file:
+                pdf_bytes = file.read()
+        else:
+            pdf_bytes = source.read()
+        source = io.BytesIO(pdf_bytes)
+        
+        page_count = count_pdf_pages(pdf_bytes)
+        if page_count >= CONFIG["pdf_parallel_min_pages"]:
+            range_size = -(-page_count // CONFIG["pdf_extraction_processes"])
+            starts = range(0, page_count, range_size)
+            pool = get_pdf_process_pool()
+            futures = [pool.submit(extract_pdf_page_range, pdf_bytes, start, min(start + range_size, page_count))
+                       for start in starts]
+            for future in futures:
+                yield from future.result()
+            return
+    
+    if pdfium is not None:
+        with pdfium_lock:
+            pdf = pdfium.PdfDocument(source)
+            try:
+                for page in pdf:
+                    textpage = page.get_textpage()
+                    page_text = textpage.get_text_bounded()
+                    textpage.close()
+                    page.close()
+                    yield page_text
+            finally:
+                pdf.close()
+        return
+    
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield from iter_pdf_page_texts(file)
+        return
+    
+    from pypdf import PdfReader
+    for page in PdfReader(source).pages:
+        yield page.extract_text() or ''
+
+def iter_pdf_paragraphs(page_texts: Iterable[str]) -> Iterator[str]:
+    """Basic paragraph reconstruction for PDFs: yield each sentence-terminated run of lines as it completes.
+    
+    Pages are consumed one at a time, so only the current page's text is held alongside the output.
+    """
+    current_paragraph = []
+    for page_text in page_texts:
+        for line in page_text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            current_paragraph.append(line)
+            if line.endswith(('.', '!', '?')):
+                yield ' '.join(current_paragraph)
+                current_paragraph.clear()  # Reuse the accumulator; join already copied its contents
+    
+    if current_paragraph:
+        yield ' '.join(current_paragraph)
+
+def process_document_content(source: Union[str, BinaryIO], file_extension: str) -> str:
+    """Extract document content with properly reconstructed paragraphs.
+    
+    `source` is either a file path or a binary file-like object (e.g. the decoded upload).
+    """
     if file_extension == 'txt':
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'r', encoding='utf-8') as file:
+                return file.read()
+        # Same decoding and newline handling as open(..., 'r'), without closing the caller's stream
+        text_stream = io.TextIOWrapper(source, encoding='utf-8')
+        try:
+            return text_stream.read()
+        finally:
+            text_stream.detach()
     
     elif file_extension == 'docx':
-        return extract_true_paragraphs_method2(file_path)
+        return extract_true_paragraphs_method2(source)
     
     elif file_extension == 'pdf':
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            
-            # Basic paragraph reconstruction for PDFs
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            paragraphs = []
-            current_paragraph = []
-            
-            for line in lines:
-                current_paragraph.append(line)
-                if line.endswith(('.', '!', '?')):
-                    paragraphs.append(' '.join(current_paragraph))
-                    current_paragraph = []
-            
-            if current_paragraph:
-                paragraphs.append(' '.join(current_paragraph))
-            
-            return '\n\n'.join(paragraphs)
+            return '\n\n'.join(iter_pdf_paragraphs(iter_pdf_page_texts(source)))
             
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}")
@@ -625,10 +1172,14 @@ def delete_document_from_index(filename: str) -> Dict:
     """Delete all chunks of a document from the index"""
     try:
         client = get_search_client()
+        # Quotes in OData string literals are escaped by doubling them. Asking for more than 1,000
+        # results makes the service page ids back 1,000 at a time instead of the default 50.
+        odata_filename = filename.replace("'", "''")
         results = client.search(
             search_text="*",
-            filter=f"filename eq '{filename}'",
-            select="id"
+            filter=f"filename eq '{odata_filename}'",
+            select="id",
+            top=SEARCH_MAX_RESULTS
         )
         
         document_ids = [doc["id"] for doc in results]
@@ -639,10 +1190,16 @@ def delete_document_from_index(filename: str) -> Dict:
                 "message": f"No documents found with filename: {filename}"
             }
         
-        delete_docs = [{"id": doc_id} for doc_id in document_ids]
-        result = client.delete_documents(delete_docs)
-        
-        successful_deletes = sum(1 for r in result if r.succeeded)
+        # The service accepts at most 1,000 actions per indexing request; delete in concurrent batches
+        batch_size = CONFIG["search_upload_batch_size"]
+        batches = [
+            [{"id": doc_id} for doc_id in document_ids[start:start + batch_size]]
+            for start in range(0, len(document_ids), batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=CONFIG["search_upload_concurrency"]) as executor:
+            successful_deletes = sum(
+                1 for batch_results in executor.map(client.delete_documents, batches) for r in batch_results if r.succeeded
+            )
         
         return {
             "status": "success",
@@ -654,15 +1211,69 @@ def delete_document_from_index(filename: str) -> Dict:
         logger.error(f"Error deleting document {filename}: {str(e)}")
         return {"status": "error", "message": str(e)}
 
-def process_document_with_ai_keyphrases(file_path: str, filename: str, force_reindex: bool = False, chunking_method: str = "intelligent") -> Dict:
-    """Enhanced version that uses OpenAI to extract intelligent key phrases"""
+def quantize_embedding_int8(vector: array) -> tuple:
+    """Symmetric per-vector int8 quantization: returns (values in [-127, 127], scale) with value * scale ~= original"""
+    peak = max(map(abs, vector), default=0.0)
+    if not peak:
+        return [0] * len(vector), 0.0
+    factor = 127 / peak
+    return [round(value * factor) for value in vector], peak / 127
+
+def to_search_document(document: Dict) -> Dict:
+    """Return the JSON-serializable form of an indexed chunk (embedding as a plain list)"""
+    if CONFIG["search_embedding_int8"]:
+        quantized, scale = quantize_embedding_int8(document["embedding"])
+        return {**document, "embedding": quantized, "embedding_scale": scale}
+    return {**document, "embedding": document["embedding"].tolist()}
+
+def upload_documents_in_batches(documents: List[Dict]) -> List["IndexingResult"]:
+    """Upload documents to Azure Search in concurrent batches; results keep document order"""
+    client = get_search_client()
+    batch_size = CONFIG["search_upload_batch_size"]
+    
+    def upload_batch(batch: List[Dict]) -> List["IndexingResult"]:
+        # Oversized requests are already split by the client on 413; documents rejected with a
+        # transient per-document status are resent with backoff, the rest of the batch is done
+        pending = [to_search_document(doc) for doc in batch]
+        results = {}
+        for attempt in range(CONFIG["search_upload_max_retries"] + 1):
+            if attempt:
+                logger.warning("Retrying upload of %d documents (attempt %d)", len(pending), attempt + 1)
+                time.sleep(2 ** (attempt - 1))
+            try:
+                for upload_result in client.upload_documents(documents=pending):
+                    results[upload_result.key] = upload_result
+            except Exception as e:
+                # A failed request only fails its own batch; report each document individually
+                logger.error("Error uploading batch of %d documents: %s", len(pending), e)
+                from azure.search.documents.models import IndexingResult
+                for doc in pending:
+                    results[doc["id"]] = IndexingResult(key=doc["id"], succeeded=False, error_message=str(e), status_code=500)
+                break
+            pending = [doc for doc in pending
+                       if not results[doc["id"]].succeeded and results[doc["id"]].status_code in SEARCH_RETRYABLE_STATUS_CODES]
+            if not pending:
+                break
+        return [results[doc["id"]] for doc in batch]
+    
+    batches = [documents[start:start + batch_size] for start in range(0, len(documents), batch_size)]
+    with ThreadPoolExecutor(max_workers=CONFIG["search_upload_concurrency"]) as executor:
+        return [result for batch_results in executor.map(upload_batch, batches) for result in batch_results]
+
+def process_document_with_ai_keyphrases(source: Union[str, BinaryIO], filename: str, force_reindex: bool = False, chunking_method: str = "intelligent", return_chunk_details: bool = True, file_extension: str = None, base_key: str = None, include_content: bool = True) -> Dict:
+    """Enhanced version that uses OpenAI to extract intelligent key phrases.
+    
+    `file_extension` and `base_key` are derived from `filename` when the caller has not already parsed them.
+    With `include_content=False` the chunk details carry a preview and hash instead of the full chunk text.
+    """
     try:
         logger.info(f"🔄 Processing document: {filename}")
         
         # Step 1: Extract content with proper paragraphs
         logger.info("📄 Extracting content with proper paragraph reconstruction...")
-        file_extension = filename.lower().split('.')[-1]
-        document_text = process_document_content(file_path, file_extension)
+        if file_extension is None:
+            file_extension = filename.rpartition('.')[2].lower()
+        document_text = process_document_content(source, file_extension)
         
         if not document_text:
             return {"status": "error", "message": "Failed to extract document content"}
@@ -693,79 +1304,74 @@ def process_document_with_ai_keyphrases(file_path: str, filename: str, force_rei
         
         # Step 3: Create enhanced chunks with AI key phrase extraction
         logger.info("🧠 Creating chunks with AI-powered key phrase extraction...")
-        documents = []
-        base_key = sanitize_document_key(filename)
+        if base_key is None:
+            base_key = sanitize_document_key(filename)
         
-        for i, chunk_text in enumerate(chunks, 1):
-            if len(chunk_text.strip()) > 50:  # Only meaningful chunks
-                logger.info(f"📝 Processing chunk {i}/{len(chunks)}...")
-                
-                # Generate AI-powered key phrases
-                keyphrases = extract_keyphrases_with_openai(chunk_text, "legal")
-                
-                # Generate embedding
-                embedding = generate_text_embedding(chunk_text)
-                
-                # Create enhanced summary using OpenAI
-                summary_prompt = f"Create a concise 1-2 sentence summary of this legal text: {chunk_text[:500]}..."
-                try:
-                    client = get_openai_client()
-                    summary_response = client.chat.completions.create(
-                        model=CONFIG["openai_model_deployment"],
-                        messages=[{"role": "user", "content": summary_prompt}],
-                        max_tokens=100,
-                        temperature=0.1,
-                        timeout=20
-                    )
-                    ai_summary = summary_response.choices[0].message.content.strip()
-                    summary = ai_summary if ai_summary else chunk_text[:100] + "..."
-                except Exception as e:
-                    logger.warning(f"Failed to generate AI summary: {e}")
-                    # Fallback summary
-                    sentences = chunk_text.split('. ')
-                    summary = sentences[0] + "." if len(sentences) > 1 else chunk_text[:100] + "..."
-                
-                # Create descriptive title using OpenAI
-                title_prompt = f"Create a short descriptive title (3-6 words) for this legal text: {chunk_text[:200]}..."
-                try:
-                    client = get_openai_client()
-                    title_response = client.chat.completions.create(
-                        model=CONFIG["openai_model_deployment"],
-                        messages=[{"role": "user", "content": title_prompt}],
-                        max_tokens=20,
-                        temperature=0.1,
-                        timeout=20
-                    )
-                    ai_title = title_response.choices[0].message.content.strip().strip('"')
-                    title = ai_title if ai_title else f"Section {i}"
-                except Exception as e:
-                    logger.warning(f"Failed to generate AI title: {e}")
-                    title = f"Section {i}"
-                
-                # Create document for indexing
-                document = {
-                    "id": f"{base_key}_{i}",
-                    "title": title,
-                    "paragraph": chunk_text.strip(),
-                    "summary": summary,
-                    "keyphrases": keyphrases,
-                    "filename": filename,
-                    "ParagraphId": str(i),
-                    "date": datetime.now().isoformat(),
-                    "group": ["legal"],
-                    "department": "legal",
-                    "language": "en",
-                    "isCompliant": True,
-                    "IrrelevantCollection": [],
-                    "NonCompliantCollection": [],
-                    "CompliantCollection": [str(i)],
-                    "embedding": embedding
-                }
-                documents.append(document)
+        # Only meaningful chunks are enriched; keep their original position for ids.
+        # Chunks are stripped once here and used stripped from then on
+        indexed_chunks = [(i, stripped) for i, chunk_text in enumerate(chunks, 1) if len(stripped := chunk_text.strip()) > 50]
+        
+        # Legal documents repeat headers, disclaimers and TOC entries; enrich each distinct
+        # paragraph once and fan the results back out to every chunk that shares it
+        chunk_digests = []
+        unique_chunks = {}
+        for i, chunk_text in indexed_chunks:
+            digest = hashlib.blake2b(chunk_text.encode("utf-8"), digest_size=16).digest()
+            chunk_digests.append(digest)
+            unique_chunks.setdefault(digest, (i, chunk_text))
+        unique_indexed_chunks = list(unique_chunks.values())
+        chunk_texts = [chunk_text for _, chunk_text in unique_indexed_chunks]
+        if len(chunk_texts) < len(indexed_chunks):
+            logger.info(f"♻️ {len(indexed_chunks) - len(chunk_texts)} duplicate chunks will reuse enrichment results")
+        
+        # Every grouped enrichment call and every embedding batch is its own task on one pool;
+        # the pool size bounds in-flight OpenAI requests to respect rate limits
+        logger.info(f"📝 Enriching {len(chunk_texts)} chunks with up to {CONFIG['openai_max_concurrency']} concurrent OpenAI requests...")
+        with ThreadPoolExecutor(max_workers=CONFIG["openai_max_concurrency"]) as executor:
+            # Title, summary and key phrases for a whole group of chunks come back from one request
+            enrichment_batch_size = CONFIG["openai_enrichment_batch_size"]
+            enrichment_futures = [
+                executor.submit(enrich_chunks_with_openai, unique_indexed_chunks[start:start + enrichment_batch_size], "legal")
+                for start in range(0, len(unique_indexed_chunks), enrichment_batch_size)
+            ]
+            # Submits the embedding batches to the same pool and waits for them on this thread
+            embeddings = generate_text_embeddings(chunk_texts, executor)
+            chunk_enrichments = [enrichment for enrichment_future in enrichment_futures for enrichment in enrichment_future.result()]
+        
+        enrichments = dict(zip(unique_chunks, zip(chunk_enrichments, embeddings)))
+        
+        # Every chunk of this upload shares one indexing timestamp
+        indexed_at = datetime.now().isoformat()
+        key_prefix = base_key + "_"
+        documents = []
+        for (i, chunk_text), digest in zip(indexed_chunks, chunk_digests):
+            enrichment, embedding = enrichments[digest]
+            paragraph_id = str(i)
+            # Create document for indexing
+            document = {
+                "id": key_prefix + paragraph_id,
+                "title": enrichment["title"],
+                "paragraph": chunk_text,
+                "summary": enrichment["summary"],
+                "keyphrases": enrichment["keyphrases"],
+                "filename": filename,
+                "ParagraphId": paragraph_id,
+                "date": indexed_at,
+                "group": list(INDEX_GROUPS),
+                "department": "legal",
+                "language": "en",
+                "isCompliant": True,
+                "IrrelevantCollection": list(INDEX_EMPTY_COLLECTION),
+                "NonCompliantCollection": list(INDEX_EMPTY_COLLECTION),
+                "CompliantCollection": [paragraph_id],
+                "embedding": embedding
+            }
+            documents.append(document)
         
         logger.info(f"✅ Created {len(documents)} AI-enhanced chunks with intelligent boundaries")
         
-        # Step 3: Handle reindexing
+        # Step 3: Handle reindexing. The old chunks are removed only once every replacement
+        # document has been built, so a failure above leaves the indexed version in place
         if force_reindex:
             logger.info("🗑️ Removing existing documents...")
             delete_result = delete_document_from_index(filename)
@@ -774,27 +1380,33 @@ def process_document_with_ai_keyphrases(file_path: str, filename: str, force_rei
         
         # Step 4: Upload to Azure Search
         logger.info(f"☁️ Uploading {len(documents)} enhanced documents to Azure Search...")
-        client = get_search_client()
-        result = client.upload_documents(documents=documents)
+        result = upload_documents_in_batches(documents)
         
-        successful_uploads = sum(1 for r in result if r.succeeded)
-        failed_uploads = len(result) - successful_uploads
-        
-        # Prepare chunk details for response (full content included)
+        # One pass over the upload results counts outcomes and, when requested,
+        # builds the chunk details (full content unless excluded) for the response
+        successful_uploads = 0
         chunk_details = []
-        for i, doc in enumerate(documents):
-            upload_result = result[i] if i < len(result) else None
-            chunk_details.append({
-                "chunk_id": doc["id"],
-                "title": doc["title"],
-                "content": doc["paragraph"].strip(),  # Full content without truncation
-                "content_size": len(doc["paragraph"]),
-                "keyphrases": doc["keyphrases"],
-                "status": "success" if (upload_result and upload_result.succeeded) else "failed",
-                "error": None if (upload_result and upload_result.succeeded) else str(getattr(upload_result, 'error_message', 'Upload failed'))
-            })
+        for doc, upload_result in zip(documents, result):
+            succeeded = bool(upload_result.succeeded)
+            successful_uploads += succeeded
+            if return_chunk_details:
+                paragraph = doc["paragraph"]  # Already stripped when the document was built
+                detail = {"chunk_id": doc["id"], "title": doc["title"]}
+                if include_content:
+                    detail["content"] = paragraph  # Full content without truncation
+                else:
+                    detail["content_preview"] = paragraph[:CHUNK_CONTENT_PREVIEW_CHARS]
+                    detail["content_sha256"] = hashlib.sha256(paragraph.encode('utf-8')).hexdigest()[:16]
+                detail.update({
+                    "content_size": len(paragraph),
+                    "keyphrases": doc["keyphrases"],
+                    "status": "success" if succeeded else "failed",
+                    "error": None if succeeded else str(getattr(upload_result, 'error_message', 'Upload failed'))
+                })
+                chunk_details.append(detail)
+        failed_uploads = len(result) - successful_uploads
         
-        return {
+        response = {
             "status": "success",
             "message": f"Successfully processed {filename} with {chunking_method} chunking",
             "filename": filename,
@@ -803,9 +1415,12 @@ def process_document_with_ai_keyphrases(file_path: str, filename: str, force_rei
             "failed_uploads": failed_uploads,
             "enhancement": enhancement_type,
             "chunking_method": chunk_method_used,
-            "chunk_details": chunk_details,
             "content_validation": validation_metrics
         }
+        if return_chunk_details:
+            response["chunk_details"] = chunk_details
+        
+        return response
         
     except Exception as e:
         logger.error(f"Error in AI keyphrase processing: {str(e)}")
@@ -822,7 +1437,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         if method == 'GET':
             # Health check or status endpoint
             return func.HttpResponse(
-                json.dumps({
+                orjson.dumps({
                     "status": "healthy",
                     "message": "Document Processing Function is running",
                     "version": "1.0.0"
@@ -832,89 +1447,116 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             )
         
         elif method == 'POST':
-            # Process document request
-            try:
-                req_body = req.get_json()
-            except ValueError:
-                return func.HttpResponse(
-                    json.dumps({"error": "Invalid JSON in request body"}),
-                    mimetype="application/json",
-                    status_code=400
-                )
-            
-            if not req_body:
-                return func.HttpResponse(
-                    json.dumps({"error": "Request body is required"}),
-                    mimetype="application/json",
-                    status_code=400
-                )
-            
-            # Extract parameters
-            file_content = req_body.get('file_content')  # Base64 encoded file
-            filename = req_body.get('filename')
-            force_reindex = req_body.get('force_reindex', False)
-            chunking_method = req_body.get('chunking_method', 'intelligent')  # 'intelligent', 'heading', or 'basic'
+            # Process document request. Raw uploads send the file itself as the body with the
+            # options in the query string; any other request is JSON with base64 'file_content'
+            content_type = req.headers.get('Content-Type', '').partition(';')[0].strip().lower()
+            raw_upload = content_type in RAW_UPLOAD_CONTENT_TYPES
+            if raw_upload:
+                file_content = req.get_body()  # File bytes
+                filename = req.params.get('filename')
+                force_reindex = parse_bool_param(req.params.get('force_reindex'), False)
+                chunking_method = req.params.get('chunking_method', 'intelligent')
+                return_chunk_details = parse_bool_param(req.params.get('return_chunk_details'), True)
+                include_content = parse_bool_param(req.params.get('include_content'), True)
+            else:
+                try:
+                    req_body = orjson.loads(req.get_body())
+                except ValueError:
+                    return func.HttpResponse(
+                        orjson.dumps({"error": "Invalid JSON in request body"}),
+                        mimetype="application/json",
+                        status_code=400
+                    )
+                
+                if not req_body:
+                    return func.HttpResponse(
+                        orjson.dumps({"error": "Request body is required"}),
+                        mimetype="application/json",
+                        status_code=400
+                    )
+                
+                # Extract parameters
+                file_content = req_body.get('file_content')  # Base64 encoded file
+                filename = req_body.get('filename')
+                force_reindex = req_body.get('force_reindex', False)
+                chunking_method = req_body.get('chunking_method', 'intelligent')  # 'intelligent', 'heading', or 'basic'
+                return_chunk_details = req_body.get('return_chunk_details', True)  # Set false for a compact response
+                include_content = req_body.get('include_content', True)  # Set false to return chunk previews only
             
             if not file_content or not filename:
                 return func.HttpResponse(
-                    json.dumps({
-                        "error": "Both 'file_content' (base64 encoded) and 'filename' are required"
+                    orjson.dumps({
+                        "error": "A file body and a 'filename' query parameter are required" if raw_upload
+                        else "Both 'file_content' (base64 encoded) and 'filename' are required"
                     }),
                     mimetype="application/json",
                     status_code=400
                 )
             
-            # Validate file extension
-            file_extension = filename.lower().split('.')[-1]
+            # Validate file extension; it and the document key are parsed once and passed through
+            file_extension = filename.rpartition('.')[2].lower()
             if file_extension not in ['txt', 'docx', 'pdf']:
                 return func.HttpResponse(
-                    json.dumps({
+                    orjson.dumps({
                         "error": f"Unsupported file type: {file_extension}. Supported types: txt, docx, pdf"
                     }),
                     mimetype="application/json",
                     status_code=400
                 )
             
-            # Decode file content and save to temporary file
-            try:
-                file_data = base64.b64decode(file_content)
-            except Exception as e:
+            # The size estimate below needs a string; anything else is a client error
+            if not raw_upload and not isinstance(file_content, str):
                 return func.HttpResponse(
-                    json.dumps({"error": f"Invalid base64 file content: {str(e)}"}),
+                    orjson.dumps({"error": "'file_content' must be a base64 encoded string"}),
                     mimetype="application/json",
                     status_code=400
                 )
             
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as temp_file:
-                temp_file.write(file_data)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Process the document
-                result = process_document_with_ai_keyphrases(
-                    file_path=temp_file_path,
-                    filename=filename,
-                    force_reindex=force_reindex,
-                    chunking_method=chunking_method
-                )
-                
+            # Reject oversized uploads before spending memory on decoding them
+            upload_bytes = len(file_content) if raw_upload else len(file_content) * 3 // 4
+            if upload_bytes > CONFIG["max_upload_bytes"]:
                 return func.HttpResponse(
-                    json.dumps(result),
+                    orjson.dumps({
+                        "error": f"File too large. Maximum size is {CONFIG['max_upload_bytes']:,} bytes"
+                    }),
                     mimetype="application/json",
-                    status_code=200 if result["status"] == "success" else 500
+                    status_code=413
                 )
-                
-            finally:
-                # Clean up temporary file
+            
+            # Decode file content; extraction reads it straight from memory
+            if raw_upload:
+                file_stream = io.BytesIO(file_content)
+            else:
                 try:
-                    os.unlink(temp_file_path)
-                except:
-                    pass
+                    file_stream = decode_base64_content(file_content)
+                except Exception as e:
+                    return func.HttpResponse(
+                        orjson.dumps({"error": f"Invalid base64 file content: {str(e)}"}),
+                        mimetype="application/json",
+                        status_code=400
+                    )
+            
+            # Process the document
+            result = process_document_with_ai_keyphrases(
+                source=file_stream,
+                filename=filename,
+                force_reindex=force_reindex,
+                chunking_method=chunking_method,
+                return_chunk_details=return_chunk_details,
+                file_extension=file_extension,
+                base_key=sanitize_document_key(filename),
+                include_content=include_content
+            )
+            
+            return func.HttpResponse(
+                orjson.dumps(result),
+                mimetype="application/json",
+                status_code=200 if result["status"] == "success" else 500
+            )
         
         else:
             return func.HttpResponse(
-                json.dumps({"error": f"Method {method} not allowed"}),
+                orjson.dumps({"error": f"Method {method} not allowed"}),
                 mimetype="application/json",
                 status_code=405
             )
@@ -922,7 +1564,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     except Exception as e:
         logger.error(f"Unexpected error in function: {str(e)}")
         return func.HttpResponse(
-            json.dumps({
+            orjson.dumps({
                 "status": "error",
                 "message": f"Internal server error: {str(e)}"
             }),
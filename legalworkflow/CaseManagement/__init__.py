@@ -1,32 +1,77 @@
 import azure.functions as func
-import json
+import orjson
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
 import os
+import threading
 from azure.storage.blob import BlobServiceClient
 from azure.cosmos import CosmosClient
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Fields returned when listing cases (full documents are fetched by id)
+CASE_LIST_FIELDS = ('id', 'case_number', 'title', 'status', 'case_type', 'priority',
+                    'assigned_attorney', 'deadline', 'modified_date')
+
+# List filters: request key -> (query condition, parameter name)
+CASE_LIST_FILTERS = {
+    'status': ("c.status = @status", '@status'),
+    'assigned_attorney': ("c.assigned_attorney = @attorney", '@attorney'),
+    'case_type': ("c.case_type = @type", '@type'),
+}
+
+DEFAULT_CASE_PAGE_SIZE = 50
+MAX_CASE_PAGE_SIZE = 100
+
+# Cosmos DB accepts at most 10 operations in one patch request
+MAX_PATCH_OPERATIONS = 10
+
+# The Cosmos client is shared across warm invocations so each request reuses its connections
+cases_container = None
+cases_container_lock = threading.Lock()
+
+def get_cases_container():
+    """Return the shared Cases container client, or None when Cosmos DB is not configured."""
+    global cases_container
+    if cases_container is None:
+        with cases_container_lock:
+            cosmos_endpoint = os.environ.get('COSMOS_DB_ENDPOINT')
+            cosmos_key = os.environ.get('COSMOS_DB_KEY')
+            if cases_container is None and cosmos_endpoint and cosmos_key:
+                cosmos_client = CosmosClient(cosmos_endpoint, cosmos_key)
+                cases_container = cosmos_client.get_database_client('LegalWorkflow').get_container_client('Cases')
+    return cases_container
+
+def parse_case_page_size(value: Any) -> int:
+    """Page size for a case listing from the 'max' parameter.
+    
+    A missing value gives the default and larger values are capped at MAX_CASE_PAGE_SIZE;
+    anything that is not a positive integer raises ValueError.
+    """
+    if value is None or value == '':
+        return DEFAULT_CASE_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'max' must be an integer, got {value!r}")
+    if page_size < 1:
+        raise ValueError(f"'max' must be at least 1, got {page_size}")
+    return min(page_size, MAX_CASE_PAGE_SIZE)
+
 class CaseManager:
     """Legal case management service."""
     
     def __init__(self):
-        """Initialize case manager with database connections."""
-        self.cosmos_endpoint = os.environ.get('COSMOS_DB_ENDPOINT')
-        self.cosmos_key = os.environ.get('COSMOS_DB_KEY')
-        
-        if self.cosmos_endpoint and self.cosmos_key:
-            self.cosmos_client = CosmosClient(self.cosmos_endpoint, self.cosmos_key)
-            self.database = self.cosmos_client.get_database_client('LegalWorkflow')
-            self.cases_container = self.database.get_container_client('Cases')
+        """Initialize case manager with the shared database connection."""
+        self.cases_container = get_cases_container()  # None when the database is not configured
     
     def create_case(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new legal case."""
         try:
             case_id = str(uuid.uuid4())
+            timestamp = datetime.utcnow().isoformat()  # A new case is created and modified at the same instant
             case = {
                 'id': case_id,
                 'case_number': case_data.get('case_number'),
@@ -38,8 +83,8 @@ class CaseManager:
                 'priority': case_data.get('priority', 'medium'),
                 'status': case_data.get('status', 'open'),
                 'assigned_attorney': case_data.get('assigned_attorney'),
-                'created_date': datetime.utcnow().isoformat(),
-                'modified_date': datetime.utcnow().isoformat(),
+                'created_date': timestamp,
+                'modified_date': timestamp,
                 'deadline': case_data.get('deadline'),
                 'estimated_hours': case_data.get('estimated_hours'),
                 'billable_rate': case_data.get('billable_rate'),
@@ -50,7 +95,7 @@ class CaseManager:
             }
             
             # Save to database if configured
-            if hasattr(self, 'cases_container'):
+            if self.cases_container is not None:
                 self.cases_container.create_item(body=case)
             
             logger.info(f"Created case: {case_id}")
@@ -66,7 +111,7 @@ class CaseManager:
     def get_case(self, case_id: str) -> Dict[str, Any]:
         """Retrieve a specific case by ID."""
         try:
-            if hasattr(self, 'cases_container'):
+            if self.cases_container is not None:
                 case = self.cases_container.read_item(item=case_id, partition_key=case_id)
                 return {
                     'status': 'success',
@@ -84,24 +129,32 @@ class CaseManager:
                 'message': str(e)
             }
     
-    def update_case(self, case_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Update an existing case."""
+    def update_case(self, case_id: str, updates: Dict[str, Any], timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """Update an existing case, stamping it with `timestamp` (default: now)."""
         try:
-            if hasattr(self, 'cases_container'):
-                # Get existing case
-                existing_case = self.cases_container.read_item(item=case_id, partition_key=case_id)
+            if self.cases_container is not None:
+                changes = {**updates, 'modified_date': timestamp or datetime.utcnow().isoformat()}
                 
-                # Apply updates
-                existing_case.update(updates)
-                existing_case['modified_date'] = datetime.utcnow().isoformat()
-                
-                # Save updated case
-                self.cases_container.replace_item(item=case_id, body=existing_case)
+                if len(changes) <= MAX_PATCH_OPERATIONS and 'id' not in changes:
+                    # Set only the changed fields in a single round-trip
+                    updated_case = self.cases_container.patch_item(
+                        item=case_id,
+                        partition_key=case_id,
+                        patch_operations=[
+                            {'op': 'set', 'path': '/' + key.replace('~', '~0').replace('/', '~1'), 'value': value}
+                            for key, value in changes.items()
+                        ]
+                    )
+                else:
+                    # Too many fields for one patch: read, apply updates and replace the document
+                    updated_case = self.cases_container.read_item(item=case_id, partition_key=case_id)
+                    updated_case.update(changes)
+                    self.cases_container.replace_item(item=case_id, body=updated_case)
                 
                 return {
                     'status': 'success',
                     'case_id': case_id,
-                    'case': existing_case
+                    'case': updated_case
                 }
             else:
                 return {
@@ -116,37 +169,35 @@ class CaseManager:
             }
     
     def list_cases(self, filters: Dict[str, Any] = None) -> Dict[str, Any]:
-        """List cases with optional filtering."""
+        """List one page of cases with optional filtering.
+        
+        `filters['max']` caps the page size (at most MAX_CASE_PAGE_SIZE) and
+        `filters['continuation_token']` resumes from the token returned with the previous page.
+        """
         try:
-            if hasattr(self, 'cases_container'):
-                query = "SELECT * FROM c"
-                parameters = []
+            if self.cases_container is not None:
+                filters = filters or {}
+                query = "SELECT " + ", ".join(f"c.{field}" for field in CASE_LIST_FIELDS) + " FROM c"
+                active = [(condition, name, filters[key])
+                          for key, (condition, name) in CASE_LIST_FILTERS.items() if filters.get(key)]
+                parameters = [{'name': name, 'value': value} for _, name, value in active]
+                if active:
+                    query += " WHERE " + " AND ".join(condition for condition, _, _ in active)
                 
-                if filters:
-                    conditions = []
-                    if filters.get('status'):
-                        conditions.append("c.status = @status")
-                        parameters.append({'name': '@status', 'value': filters['status']})
-                    if filters.get('assigned_attorney'):
-                        conditions.append("c.assigned_attorney = @attorney")
-                        parameters.append({'name': '@attorney', 'value': filters['assigned_attorney']})
-                    if filters.get('case_type'):
-                        conditions.append("c.case_type = @type")
-                        parameters.append({'name': '@type', 'value': filters['case_type']})
-                    
-                    if conditions:
-                        query += " WHERE " + " AND ".join(conditions)
-                
-                cases = list(self.cases_container.query_items(
+                page_size = parse_case_page_size(filters.get('max'))
+                pages = self.cases_container.query_items(
                     query=query,
                     parameters=parameters,
-                    enable_cross_partition_query=True
-                ))
+                    enable_cross_partition_query=True,
+                    max_item_count=page_size
+                ).by_page(filters.get('continuation_token'))
+                cases = list(next(pages, []))
                 
                 return {
                     'status': 'success',
                     'cases': cases,
-                    'count': len(cases)
+                    'count': len(cases),
+                    'continuation_token': pages.continuation_token
                 }
             else:
                 return {
@@ -163,10 +214,11 @@ class CaseManager:
     def archive_case(self, case_id: str) -> Dict[str, Any]:
         """Archive a case (soft delete)."""
         try:
+            timestamp = datetime.utcnow().isoformat()
             return self.update_case(case_id, {
                 'status': 'archived',
-                'archived_date': datetime.utcnow().isoformat()
-            })
+                'archived_date': timestamp
+            }, timestamp=timestamp)
         except Exception as e:
             logger.error(f"Failed to archive case {case_id}: {str(e)}")
             return {
@@ -183,23 +235,23 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         if method == "POST":
             # Create new case
             try:
-                req_body = req.get_json()
+                req_body = orjson.loads(req.get_body())
                 if not req_body:
                     return func.HttpResponse(
-                        json.dumps({'status': 'error', 'message': 'Invalid JSON body'}),
+                        orjson.dumps({'status': 'error', 'message': 'Invalid JSON body'}),
                         status_code=400,
                         mimetype="application/json"
                     )
                 
                 result = case_manager.create_case(req_body)
                 return func.HttpResponse(
-                    json.dumps(result),
+                    orjson.dumps(result),
                     status_code=201,
                     mimetype="application/json"
                 )
             except Exception as e:
                 return func.HttpResponse(
-                    json.dumps({'status': 'error', 'message': str(e)}),
+                    orjson.dumps({'status': 'error', 'message': str(e)}),
                     status_code=400,
                     mimetype="application/json"
                 )
@@ -214,19 +266,25 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 status_code = 200 if result['status'] == 'success' else 404
             else:
                 # List cases with optional filters
-                filters = {}
-                if req.params.get('status'):
-                    filters['status'] = req.params.get('status')
-                if req.params.get('assigned_attorney'):
-                    filters['assigned_attorney'] = req.params.get('assigned_attorney')
-                if req.params.get('case_type'):
-                    filters['case_type'] = req.params.get('case_type')
+                filters = {
+                    key: req.params.get(key)
+                    for key in (*CASE_LIST_FILTERS, 'max', 'continuation_token')
+                    if req.params.get(key)
+                }
+                try:
+                    filters['max'] = parse_case_page_size(filters.get('max'))
+                except ValueError as e:
+                    return func.HttpResponse(
+                        orjson.dumps({'status': 'error', 'message': str(e)}),
+                        status_code=400,
+                        mimetype="application/json"
+                    )
                 
                 result = case_manager.list_cases(filters)
                 status_code = 200 if result['status'] == 'success' else 500
             
             return func.HttpResponse(
-                json.dumps(result),
+                orjson.dumps(result),
                 status_code=status_code,
                 mimetype="application/json"
             )
@@ -236,16 +294,16 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             case_id = req.params.get('id')
             if not case_id:
                 return func.HttpResponse(
-                    json.dumps({'status': 'error', 'message': 'Case ID required'}),
+                    orjson.dumps({'status': 'error', 'message': 'Case ID required'}),
                     status_code=400,
                     mimetype="application/json"
                 )
             
             try:
-                req_body = req.get_json()
+                req_body = orjson.loads(req.get_body())
                 if not req_body:
                     return func.HttpResponse(
-                        json.dumps({'status': 'error', 'message': 'Invalid JSON body'}),
+                        orjson.dumps({'status': 'error', 'message': 'Invalid JSON body'}),
                         status_code=400,
                         mimetype="application/json"
                     )
@@ -254,13 +312,13 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 status_code = 200 if result['status'] == 'success' else 404
                 
                 return func.HttpResponse(
-                    json.dumps(result),
+                    orjson.dumps(result),
                     status_code=status_code,
                     mimetype="application/json"
                 )
             except Exception as e:
                 return func.HttpResponse(
-                    json.dumps({'status': 'error', 'message': str(e)}),
+                    orjson.dumps({'status': 'error', 'message': str(e)}),
                     status_code=400,
                     mimetype="application/json"
                 )
@@ -270,7 +328,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             case_id = req.params.get('id')
             if not case_id:
                 return func.HttpResponse(
-                    json.dumps({'status': 'error', 'message': 'Case ID required'}),
+                    orjson.dumps({'status': 'error', 'message': 'Case ID required'}),
                     status_code=400,
                     mimetype="application/json"
                 )
@@ -279,14 +337,14 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             status_code = 200 if result['status'] == 'success' else 404
             
             return func.HttpResponse(
-                json.dumps(result),
+                orjson.dumps(result),
                 status_code=status_code,
                 mimetype="application/json"
             )
         
         else:
             return func.HttpResponse(
-                json.dumps({'status': 'error', 'message': 'Method not allowed'}),
+                orjson.dumps({'status': 'error', 'message': 'Method not allowed'}),
                 status_code=405,
                 mimetype="application/json"
             )
@@ -294,7 +352,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     except Exception as e:
         logger.error(f"Case management error: {str(e)}")
         return func.HttpResponse(
-            json.dumps({'status': 'error', 'message': 'Internal server error'}),
+            orjson.dumps({'status': 'error', 'message': 'Internal server error'}),
             status_code=500,
             mimetype="application/json"
         )
\ No newline at end of file
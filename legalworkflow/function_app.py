@@ -145,10 +145,8 @@ def process_uploaded_document(blob: func.InputStream) -> None:
     try:
         logger.info(f"Processing uploaded document: {blob.name}")
         
-        # Process document content
-        content = blob.read()
-        
-        # Extract metadata, classify document type, etc.
+        # Nothing consumes the content yet, so it is not read; read it in bounded chunks
+        # (blob.read(size)) once extraction, classification, etc. are added here
         
         logger.info(f"Document {blob.name} processed successfully")
     except Exception as e:
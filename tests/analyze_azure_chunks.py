@@ -7,22 +7,32 @@ cursor = conn.cursor()
 print("🔍 AZURE FUNCTION CHUNKS ANALYSIS")
 print("=" * 50)
 
-# Get detailed chunk information
+# Get detailed chunk information and the summary statistics in one scan;
+# the window aggregates repeat the totals on every row
 cursor.execute('''
     SELECT af.session_id, af.document_id, d.filename, af.azure_chunk_index, 
            af.azure_chunk_size, af.upload_status, af.error_message, af.processing_time_ms,
            SUBSTR(af.azure_chunk_content, 1, 100) as content_preview,
-           af.created_at
+           af.created_at,
+           COUNT(*) OVER () as total_chunks,
+           COUNT(CASE WHEN af.upload_status = 'success' THEN 1 END) OVER () as successful,
+           COUNT(CASE WHEN af.upload_status = 'failed' THEN 1 END) OVER () as failed,
+           AVG(af.azure_chunk_size) OVER () as avg_size,
+           MIN(af.azure_chunk_size) OVER () as min_size,
+           MAX(af.azure_chunk_size) OVER () as max_size,
+           AVG(af.processing_time_ms) OVER () as avg_processing_time
     FROM azure_function_chunks af
     JOIN documents d ON af.document_id = d.id
     ORDER BY af.session_id, af.azure_chunk_index
 ''')
 
-chunks = cursor.fetchall()
-print(f"📊 Found {len(chunks)} Azure Function chunks\n")
-
-for chunk in chunks:
-    session_id, doc_id, filename, chunk_idx, size, status, error, time_ms, preview, created = chunk
+# Rows are printed as they are read instead of being collected first
+stats = None
+for chunk in cursor:
+    session_id, doc_id, filename, chunk_idx, size, status, error, time_ms, preview, created = chunk[:10]
+    if stats is None:
+        stats = chunk[10:]
+        print(f"📊 Found {stats[0]} Azure Function chunks\n")
     
     print(f"🔹 Chunk {chunk_idx + 1}")
     print(f"   📄 File: {filename}")
@@ -35,20 +45,10 @@ for chunk in chunks:
     print(f"   🕐 Created: {created}")
     print()
 
-# Get summary statistics
-cursor.execute('''
-    SELECT 
-        COUNT(*) as total_chunks,
-        COUNT(CASE WHEN upload_status = 'success' THEN 1 END) as successful,
-        COUNT(CASE WHEN upload_status = 'failed' THEN 1 END) as failed,
-        AVG(azure_chunk_size) as avg_size,
-        MIN(azure_chunk_size) as min_size,
-        MAX(azure_chunk_size) as max_size,
-        AVG(processing_time_ms) as avg_processing_time
-    FROM azure_function_chunks
-''')
+if stats is None:
+    print("📊 Found 0 Azure Function chunks\n")
+    stats = (0, 0, 0, None, None, None, None)
 
-stats = cursor.fetchone()
 total, successful, failed, avg_size, min_size, max_size, avg_time = stats
 
 print("📈 SUMMARY STATISTICS")
@@ -22,13 +22,172 @@ Usage:
 
 import pyodbc
 import hashlib
-import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple
 
+# Let the ODBC driver manager keep physical connections alive between pyodbc.connect calls
+pyodbc.pooling = True
+
+# Idle connections kept per connection string, shared by every manager for the same database
+POOL_MAX_SIZE = 5
+
+# Pooled connections idle for longer than this are checked with SELECT 1 before reuse
+POOL_VALIDATE_AFTER_SECONDS = 60
+
+_connection_pools: Dict[str, queue.LifoQueue] = {}
+_connection_pools_lock = threading.Lock()
+
 class AzureSQLChunkManager:
     """Manages Azure SQL database for chunk preprocessing and tracking"""
     
+    # Whole schema as one idempotent T-SQL batch. The migration for older documents tables
+    # runs through EXEC so the batch still compiles while those columns are missing.
+    SCHEMA_SQL = """
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='documents' AND xtype='U')
+        CREATE TABLE documents (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            filename NVARCHAR(255) NOT NULL,
+            file_size INT,
+            file_hash CHAR(64) COLLATE Latin1_General_100_BIN2 UNIQUE NOT NULL,
+            content_preview NVARCHAR(256),
+            created_at DATETIME2 DEFAULT GETUTCDATE(),
+            processed_at DATETIME2 NULL,
+            processing_status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            total_chunks INT NOT NULL DEFAULT 0,
+            sum_chunk_size BIGINT NOT NULL DEFAULT 0,
+            min_chunk_size INT NULL,
+            max_chunk_size INT NULL
+        );
+        
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='chunks' AND xtype='U')
+        CREATE TABLE chunks (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            document_id INT,
+            chunk_index INT,
+            chunk_content NVARCHAR(MAX),
+            chunk_size INT,
+            chunk_hash CHAR(64) COLLATE Latin1_General_100_BIN2 NOT NULL,
+            created_at DATETIME2 DEFAULT GETUTCDATE(),
+            upload_status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            error_message NVARCHAR(MAX) NULL,
+            FOREIGN KEY (document_id) REFERENCES documents (id)
+        );
+        
+        -- Older databases: add the per-document chunk totals and backfill them once
+        IF COL_LENGTH('documents', 'total_chunks') IS NULL
+        BEGIN
+            EXEC('ALTER TABLE documents ADD
+                      total_chunks INT NOT NULL DEFAULT 0,
+                      sum_chunk_size BIGINT NOT NULL DEFAULT 0,
+                      min_chunk_size INT NULL,
+                      max_chunk_size INT NULL');
+            EXEC('UPDATE d
+                  SET total_chunks = s.total_chunks, sum_chunk_size = s.sum_chunk_size,
+                      min_chunk_size = s.min_chunk_size, max_chunk_size = s.max_chunk_size
+                  FROM documents d
+                  JOIN (
+                      SELECT document_id, COUNT(*) AS total_chunks,
+                             SUM(CAST(chunk_size AS BIGINT)) AS sum_chunk_size,
+                             MIN(chunk_size) AS min_chunk_size, MAX(chunk_size) AS max_chunk_size
+                      FROM chunks
+                      GROUP BY document_id
+                  ) s ON s.document_id = d.id');
+        END;
+        
+        -- Older databases: previews are at most 203 characters, so keep them in-row
+        IF EXISTS (SELECT * FROM sys.columns
+                   WHERE object_id = OBJECT_ID('documents') AND name = 'content_preview' AND max_length = -1)
+        BEGIN
+            EXEC('UPDATE documents SET content_preview = LEFT(content_preview, 256)
+                  WHERE LEN(content_preview) > 256');
+            EXEC('ALTER TABLE documents ALTER COLUMN content_preview NVARCHAR(256) NULL');
+        END;
+        
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='processing_sessions' AND xtype='U')
+        CREATE TABLE processing_sessions (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            document_id INT,
+            session_start DATETIME2 DEFAULT GETUTCDATE(),
+            session_end DATETIME2 NULL,
+            total_chunks INT,
+            successful_chunks INT DEFAULT 0,
+            failed_chunks INT DEFAULT 0,
+            processing_time_seconds REAL NULL,
+            FOREIGN KEY (document_id) REFERENCES documents (id)
+        );
+        
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='azure_function_chunks' AND xtype='U')
+        CREATE TABLE azure_function_chunks (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            session_id INT,
+            document_id INT,
+            azure_chunk_index INT,
+            azure_chunk_content NVARCHAR(MAX),
+            azure_chunk_size INT,
+            azure_chunk_hash CHAR(64) COLLATE Latin1_General_100_BIN2 NOT NULL,
+            upload_status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            error_message NVARCHAR(MAX) NULL,
+            processing_time_ms REAL NULL,
+            key_phrases NVARCHAR(MAX) NULL,
+            created_at DATETIME2 DEFAULT GETUTCDATE(),
+            FOREIGN KEY (session_id) REFERENCES processing_sessions (id),
+            FOREIGN KEY (document_id) REFERENCES documents (id)
+        );
+        
+        -- Secondary indexes for the per-document, per-session, failed-chunk and recent-session lookups
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_chunks_doc')
+        CREATE INDEX IX_chunks_doc ON chunks (document_id, chunk_index)
+            INCLUDE (chunk_size, upload_status);
+        
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_af_session')
+        CREATE INDEX IX_af_session ON azure_function_chunks (session_id, azure_chunk_index)
+            INCLUDE (upload_status);
+        
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_af_failed')
+        CREATE INDEX IX_af_failed ON azure_function_chunks (session_id, azure_chunk_index)
+            WHERE upload_status = 'failed';
+        
+        -- Older databases keyed IX_ps_start on session_start alone; rebuild it with the id tiebreaker
+        IF EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID('processing_sessions')
+                   AND name = 'IX_ps_start' AND INDEX_COL('processing_sessions', index_id, 2) IS NULL)
+        DROP INDEX IX_ps_start ON processing_sessions;
+        
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_ps_start')
+        CREATE INDEX IX_ps_start ON processing_sessions (session_start DESC, id DESC)
+            INCLUDE (document_id, session_end, total_chunks, successful_chunks,
+                     failed_chunks, processing_time_seconds);
+    """
+    
+    # (server, database) pairs whose schema this process has already ensured
+    _schema_ready = set()
+    _schema_ready_lock = threading.Lock()
+    
+    # Batched insert statements with their parameter types; the explicit sizes keep
+    # fast_executemany from guessing buffer sizes, (MAX) text columns are bound with size 0
+    # and hashes as fixed CHAR(64) like their columns
+    INSERT_CHUNK_SQL = """
+        INSERT INTO chunks (document_id, chunk_index, chunk_content, chunk_size, chunk_hash)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    INSERT_CHUNK_SIZES = [
+        (pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_WVARCHAR, 0, 0),
+        (pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_CHAR, 64, 0),
+    ]
+    INSERT_AZURE_CHUNK_SQL = """
+        INSERT INTO azure_function_chunks 
+        (session_id, document_id, azure_chunk_index, azure_chunk_content, 
+         azure_chunk_size, azure_chunk_hash)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    INSERT_AZURE_CHUNK_SIZES = [
+        (pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_INTEGER, 0, 0),
+        (pyodbc.SQL_WVARCHAR, 0, 0), (pyodbc.SQL_INTEGER, 0, 0), (pyodbc.SQL_CHAR, 64, 0),
+    ]
+    
     def __init__(self, server: str, database: str, username: str, password: str, 
                  driver: str = "ODBC Driver 18 for SQL Server"):
         """Initialize Azure SQL connection and create tables"""
@@ -65,108 +224,116 @@ class AzureSQLChunkManager:
                 f"Connection Timeout=30;"
             )
         
+        with _connection_pools_lock:
+            self._pool = _connection_pools.setdefault(self.connection_string, queue.LifoQueue(maxsize=POOL_MAX_SIZE))
+        
         self.init_database()
     
+    def _checkout(self):
+        """Take a live connection from the pool, or open a new one"""
+        while True:
+            try:
+                conn, idle_since = self._pool.get_nowait()
+            except queue.Empty:
+                return pyodbc.connect(self.connection_string)
+            if time.monotonic() - idle_since < POOL_VALIDATE_AFTER_SECONDS:
+                return conn
+            try:
+                conn.cursor().execute("SELECT 1").fetchone()
+                return conn
+            except pyodbc.Error:
+                self._discard(conn)
+    
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+    
+    @contextmanager
     def get_connection(self):
-        """Get a new database connection"""
-        return pyodbc.connect(self.connection_string)
+        """Borrow a pooled database connection
+        
+        Like a pyodbc connection used as a context manager, the work is committed on success
+        and rolled back on error; the connection then goes back to the pool.
+        """
+        conn = self._checkout()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            # A connection that cannot roll back is dropped; the caller still sees the
+            # error that aborted its work, not the rollback failure
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                self._discard(conn)
+            else:
+                self._release(conn)
+            raise
+        self._release(conn)
+    
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            self._discard(conn)
+    
+    def close(self):
+        """Close the idle pooled connections for this database"""
+        while True:
+            try:
+                conn, _ = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
     
     def init_database(self):
-        """Create database tables if they don't exist"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Create documents table
-            cursor.execute("""
-                IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='documents' AND xtype='U')
-                CREATE TABLE documents (
-                    id INT IDENTITY(1,1) PRIMARY KEY,
-                    filename NVARCHAR(255) NOT NULL,
-                    file_size INT,
-                    file_hash NVARCHAR(64) UNIQUE,
-                    content_preview NVARCHAR(MAX),
-                    created_at DATETIME2 DEFAULT GETUTCDATE(),
-                    processed_at DATETIME2 NULL,
-                    processing_status NVARCHAR(50) DEFAULT 'pending'
-                )
-            """)
-            
-            # Create chunks table
-            cursor.execute("""
-                IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='chunks' AND xtype='U')
-                CREATE TABLE chunks (
-                    id INT IDENTITY(1,1) PRIMARY KEY,
-                    document_id INT,
-                    chunk_index INT,
-                    chunk_content NVARCHAR(MAX),
-                    chunk_size INT,
-                    chunk_hash NVARCHAR(64),
-                    created_at DATETIME2 DEFAULT GETUTCDATE(),
-                    upload_status NVARCHAR(50) DEFAULT 'pending',
-                    error_message NVARCHAR(MAX) NULL,
-                    FOREIGN KEY (document_id) REFERENCES documents (id)
-                )
-            """)
-            
-            # Create processing_sessions table
-            cursor.execute("""
-                IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='processing_sessions' AND xtype='U')
-                CREATE TABLE processing_sessions (
-                    id INT IDENTITY(1,1) PRIMARY KEY,
-                    document_id INT,
-                    session_start DATETIME2 DEFAULT GETUTCDATE(),
-                    session_end DATETIME2 NULL,
-                    total_chunks INT,
-                    successful_chunks INT DEFAULT 0,
-                    failed_chunks INT DEFAULT 0,
-                    processing_time_seconds REAL NULL,
-                    FOREIGN KEY (document_id) REFERENCES documents (id)
-                )
-            """)
-            
-            # Create azure_function_chunks table
-            cursor.execute("""
-                IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='azure_function_chunks' AND xtype='U')
-                CREATE TABLE azure_function_chunks (
-                    id INT IDENTITY(1,1) PRIMARY KEY,
-                    session_id INT,
-                    document_id INT,
-                    azure_chunk_index INT,
-                    azure_chunk_content NVARCHAR(MAX),
-                    azure_chunk_size INT,
-                    azure_chunk_hash NVARCHAR(64),
-                    upload_status NVARCHAR(50) DEFAULT 'pending',
-                    error_message NVARCHAR(MAX) NULL,
-                    processing_time_ms REAL NULL,
-                    key_phrases NVARCHAR(MAX) NULL,
-                    created_at DATETIME2 DEFAULT GETUTCDATE(),
-                    FOREIGN KEY (session_id) REFERENCES processing_sessions (id),
-                    FOREIGN KEY (document_id) REFERENCES documents (id)
-                )
-            """)
-            
-            conn.commit()
+        """Create database tables if they don't exist (once per database per process)"""
+        key = (self.server, self.database)
+        with self._schema_ready_lock:
+            if key in self._schema_ready:
+                return
+            with self.get_connection() as conn:
+                conn.cursor().execute(self.SCHEMA_SQL)
+                conn.commit()
+            self._schema_ready.add(key)
     
     def calculate_file_hash(self, file_content: bytes) -> str:
         """Calculate SHA256 hash of file content"""
         return hashlib.sha256(file_content).hexdigest()
     
+    @staticmethod
+    def hash_chunks(chunks: List[str]) -> List[str]:
+        """SHA256 of each chunk; repeated chunks (headers, footers, boilerplate) are hashed once"""
+        digests = {}
+        hashes = []
+        for chunk_content in chunks:
+            chunk_hash = digests.get(chunk_content)
+            if chunk_hash is None:
+                chunk_hash = digests[chunk_content] = hashlib.sha256(chunk_content.encode('utf-8')).hexdigest()
+            hashes.append(chunk_hash)
+        return hashes
+    
     def add_document(self, filename: str, file_content: bytes) -> Tuple[int, bool]:
         """Add document to database and return (document_id, is_new)"""
         file_hash = self.calculate_file_hash(file_content)
         file_size = len(file_content)
         
-        # Create content preview (first 200 chars of decoded content)
+        # Create content preview (first 200 chars of decoded content); 1024 bytes cover
+        # 200 characters even at 4 bytes each, so the rest of the file is never decoded
         try:
-            content_preview = file_content.decode('utf-8', errors='ignore')[:200] + '...'
-        except:
+            content_preview = file_content[:1024].decode('utf-8', errors='ignore')[:200] + '...'
+        except Exception:
             content_preview = f"Binary file ({file_size} bytes)"
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             # Check if document already exists
-            cursor.execute("SELECT id FROM documents WHERE file_hash = ?", (file_hash,))
+            # The hash is bound as CHAR(64) so the lookup can seek the unique index
+            cursor.execute("SELECT id FROM documents WHERE file_hash = CAST(? AS CHAR(64))", (file_hash,))
             existing = cursor.fetchone()
             
             if existing:
@@ -184,39 +351,83 @@ class AzureSQLChunkManager:
             
             return document_id, True  # Return new document ID and True (is new)
     
-    def add_chunks(self, document_id: int, chunks: List[str], preserve_existing: bool = True) -> List[int]:
-        """Add chunks for a document and return chunk IDs"""
-        chunk_ids = []
+    def add_chunks(self, document_id: int, chunks: List[str], preserve_existing: bool = True,
+                   return_ids: bool = True) -> Optional[List[int]]:
+        """Add chunks for a document and return chunk IDs
         
+        With return_ids=False, a document that already has chunks is only probed for one
+        row and None is returned instead of its existing chunk IDs.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             if preserve_existing:
                 # Check if chunks already exist for this document
-                cursor.execute("SELECT id FROM chunks WHERE document_id = ? ORDER BY chunk_index", (document_id,))
-                existing_chunks = cursor.fetchall()
-                
-                if existing_chunks:
-                    return [row[0] for row in existing_chunks]
-            
-            # Add new chunks
-            for i, chunk_content in enumerate(chunks):
-                chunk_size = len(chunk_content)
-                chunk_hash = hashlib.sha256(chunk_content.encode('utf-8')).hexdigest()
-                
+                if not return_ids:
+                    cursor.execute("SELECT TOP 1 1 FROM chunks WHERE document_id = ?", (document_id,))
+                    if cursor.fetchone():
+                        return None
+                else:
+                    cursor.execute("SELECT id FROM chunks WHERE document_id = ? ORDER BY chunk_index", (document_id,))
+                    existing_chunks = cursor.fetchall()
+                    
+                    if existing_chunks:
+                        return [row[0] for row in existing_chunks]
+            
+            # Add new chunks in one batched round-trip
+            rows = [
+                (document_id, i, chunk_content, len(chunk_content), chunk_hash)
+                for i, (chunk_content, chunk_hash) in enumerate(zip(chunks, self.hash_chunks(chunks)))
+            ]
+            chunk_ids = self._insert_many(cursor, self.INSERT_CHUNK_SQL, self.INSERT_CHUNK_SIZES,
+                                          rows, "chunks", "document_id", "documents", document_id)
+            
+            # Keep the document's chunk totals current for get_preprocessing_stats
+            if rows:
+                sizes = [row[3] for row in rows]
+                min_size, max_size = min(sizes), max(sizes)
                 cursor.execute("""
-                    INSERT INTO chunks (document_id, chunk_index, chunk_content, chunk_size, chunk_hash)
-                    OUTPUT INSERTED.id
-                    VALUES (?, ?, ?, ?, ?)
-                """, (document_id, i, chunk_content, chunk_size, chunk_hash))
-                
-                chunk_id = cursor.fetchone()[0]
-                chunk_ids.append(chunk_id)
+                    UPDATE documents
+                    SET total_chunks = total_chunks + ?,
+                        sum_chunk_size = sum_chunk_size + ?,
+                        min_chunk_size = CASE WHEN min_chunk_size IS NULL OR ? < min_chunk_size
+                                              THEN ? ELSE min_chunk_size END,
+                        max_chunk_size = CASE WHEN max_chunk_size IS NULL OR ? > max_chunk_size
+                                              THEN ? ELSE max_chunk_size END
+                    WHERE id = ?
+                """, (len(sizes), sum(sizes), min_size, min_size, max_size, max_size, document_id))
             
             conn.commit()
         
         return chunk_ids
     
+    def _insert_many(self, cursor, insert_sql: str, input_sizes: List[tuple], rows: List[tuple],
+                     table: str, owner_column: str, owner_table: str, owner_id: int) -> List[int]:
+        """Insert rows with one batched executemany and return their IDs in insertion order
+        
+        The new rows are found as the owner's rows above its previous highest ID, which
+        replaces a per-row OUTPUT INSERTED.id round-trip. The owner's row in `owner_table`
+        stays update-locked until the caller commits, so concurrent inserts for the same
+        owner run one after another and never pick up each other's rows.
+        """
+        if not rows:
+            return []
+        
+        cursor.execute(f"SELECT id FROM {owner_table} WITH (UPDLOCK, HOLDLOCK) WHERE id = ?", (owner_id,))
+        cursor.fetchall()
+        
+        cursor.execute(f"SELECT ISNULL(MAX(id), 0) FROM {table} WHERE {owner_column} = ?", (owner_id,))
+        last_id = cursor.fetchone()[0]
+        
+        cursor.fast_executemany = True
+        cursor.setinputsizes(input_sizes)
+        cursor.executemany(insert_sql, rows)
+        cursor.setinputsizes(None)
+        
+        cursor.execute(f"SELECT id FROM {table} WHERE {owner_column} = ? AND id > ? ORDER BY id",
+                       (owner_id, last_id))
+        return [row[0] for row in cursor.fetchall()]
+    
     def start_processing_session(self, document_id: int, total_chunks: int) -> int:
         """Start a new processing session and return session ID"""
         with self.get_connection() as conn:
@@ -251,27 +462,18 @@ class AzureSQLChunkManager:
     
     def add_azure_function_chunks(self, session_id: int, document_id: int, azure_chunks: List[Dict]) -> List[int]:
         """Add Azure Function chunks to tracking table"""
-        chunk_ids = []
+        # Rows are hashed before a pooled connection is borrowed
+        contents = [chunk_data.get('content', '') for chunk_data in azure_chunks]
+        rows = [
+            (session_id, document_id, chunk_data.get('index', 0), chunk_content, len(chunk_content), chunk_hash)
+            for chunk_data, chunk_content, chunk_hash in zip(azure_chunks, contents, self.hash_chunks(contents))
+        ]
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            for chunk_data in azure_chunks:
-                chunk_content = chunk_data.get('content', '')
-                chunk_index = chunk_data.get('index', 0)
-                chunk_size = len(chunk_content)
-                chunk_hash = hashlib.sha256(chunk_content.encode('utf-8')).hexdigest()
-                
-                cursor.execute("""
-                    INSERT INTO azure_function_chunks 
-                    (session_id, document_id, azure_chunk_index, azure_chunk_content, 
-                     azure_chunk_size, azure_chunk_hash)
-                    OUTPUT INSERTED.id
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (session_id, document_id, chunk_index, chunk_content, chunk_size, chunk_hash))
-                
-                chunk_id = cursor.fetchone()[0]
-                chunk_ids.append(chunk_id)
+            chunk_ids = self._insert_many(cursor, self.INSERT_AZURE_CHUNK_SQL, self.INSERT_AZURE_CHUNK_SIZES,
+                                          rows, "azure_function_chunks", "session_id", "processing_sessions", session_id)
             
             conn.commit()
         
@@ -290,14 +492,42 @@ class AzureSQLChunkManager:
             """, (status, error_message, processing_time_ms, key_phrases, azure_chunk_id))
             conn.commit()
     
-    def get_azure_function_chunks(self, session_id: int = None, document_id: int = None) -> List[Dict]:
+    def update_azure_chunk_status_many(self, updates: List[Tuple[int, str, Optional[str], Optional[float], Optional[str]]]):
+        """Update many Azure Function chunk statuses in one batch
+        
+        Each update is (azure_chunk_id, status, error_message, processing_time_ms, key_phrases).
+        """
+        if not updates:
+            return
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            cursor.executemany("""
+                UPDATE azure_function_chunks 
+                SET upload_status = ?, error_message = ?, processing_time_ms = ?, key_phrases = ?
+                WHERE id = ?
+            """, [(status, error_message, processing_time_ms, key_phrases, azure_chunk_id)
+                  for azure_chunk_id, status, error_message, processing_time_ms, key_phrases in updates])
+            conn.commit()
+    
+    def get_azure_function_chunks(self, session_id: int = None, document_id: int = None,
+                                  include_content: bool = True) -> List[Dict]:
         """Get Azure Function chunks with optional filtering"""
+        return list(self.iter_azure_function_chunks(session_id, document_id, include_content))
+    
+    def iter_azure_function_chunks(self, session_id: int = None, document_id: int = None,
+                                   include_content: bool = False, batch_size: int = 1000):
+        """Yield Azure Function chunks with optional filtering, fetching batch_size rows at a time
+        
+        Chunk text is only read when include_content is set; otherwise azure_chunk_content is None.
+        """
+        content_column = "af.azure_chunk_content" if include_content else "NULL"
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            query = """
+            query = f"""
                 SELECT af.id, af.session_id, af.document_id, d.filename, 
-                       af.azure_chunk_index, af.azure_chunk_content, af.azure_chunk_size,
+                       af.azure_chunk_index, {content_column}, af.azure_chunk_size,
                        af.azure_chunk_hash, af.upload_status, af.error_message, af.created_at
                 FROM azure_function_chunks af
                 JOIN documents d ON af.document_id = d.id
@@ -318,24 +548,24 @@ class AzureSQLChunkManager:
             query += " ORDER BY af.session_id, af.azure_chunk_index"
             
             cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            return [
-                {
-                    'chunk_id': row[0],
-                    'session_id': row[1],
-                    'document_id': row[2],
-                    'filename': row[3],
-                    'azure_chunk_index': row[4],
-                    'azure_chunk_content': row[5],
-                    'azure_chunk_size': row[6],
-                    'chunk_hash': row[7][:12] + '...' if row[7] else '',
-                    'created_at': row[10],
-                    'upload_status': row[8],
-                    'error_message': row[9]
-                }
-                for row in results
-            ]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield {
+                        'chunk_id': row[0],
+                        'session_id': row[1],
+                        'document_id': row[2],
+                        'filename': row[3],
+                        'azure_chunk_index': row[4],
+                        'azure_chunk_content': row[5],
+                        'azure_chunk_size': row[6],
+                        'chunk_hash': row[7][:12] + '...' if row[7] else '',
+                        'created_at': row[10],
+                        'upload_status': row[8],
+                        'error_message': row[9]
+                    }
     
     def get_failed_azure_chunks(self, session_id: int = None) -> List[Dict]:
         """Get failed Azure Function chunks for analysis"""
@@ -374,32 +604,41 @@ class AzureSQLChunkManager:
                 for row in results
             ]
     
-    def get_processing_sessions(self, document_id: int = None) -> List[Dict]:
-        """Get processing sessions"""
+    def get_processing_sessions(self, document_id: int = None, limit: int = 100,
+                                before: Optional[Tuple[datetime, int]] = None) -> List[Dict]:
+        """Get one page of the most recent processing sessions
+        
+        Returns at most `limit` sessions (100 by default), newest first, so older history is
+        cut off. Pass the last row's (session_start, session_id) as `before` to fetch the next
+        page, or use iter_processing_sessions for the full history.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            query = """
+                SELECT TOP (?) ps.id, ps.document_id, d.filename, ps.session_start, 
+                       ps.session_end, ps.total_chunks, ps.successful_chunks, 
+                       ps.failed_chunks, ps.processing_time_seconds
+                FROM processing_sessions ps
+                JOIN documents d ON ps.document_id = d.id
+            """
+            params = [limit]
+            
+            where_conditions = []
             if document_id:
-                query = """
-                    SELECT ps.id, ps.document_id, d.filename, ps.session_start, 
-                           ps.session_end, ps.total_chunks, ps.successful_chunks, 
-                           ps.failed_chunks, ps.processing_time_seconds
-                    FROM processing_sessions ps
-                    JOIN documents d ON ps.document_id = d.id
-                    WHERE ps.document_id = ?
-                    ORDER BY ps.session_start DESC
-                """
-                cursor.execute(query, (document_id,))
-            else:
-                query = """
-                    SELECT ps.id, ps.document_id, d.filename, ps.session_start, 
-                           ps.session_end, ps.total_chunks, ps.successful_chunks, 
-                           ps.failed_chunks, ps.processing_time_seconds
-                    FROM processing_sessions ps
-                    JOIN documents d ON ps.document_id = d.id
-                    ORDER BY ps.session_start DESC
-                """
-                cursor.execute(query)
+                where_conditions.append("ps.document_id = ?")
+                params.append(document_id)
+            if before:
+                # Keyset on (session_start, id) so sessions sharing a start time are not skipped
+                before_start, before_id = before
+                where_conditions.append("(ps.session_start < ? OR (ps.session_start = ? AND ps.id < ?))")
+                params.extend((before_start, before_start, before_id))
+            
+            if where_conditions:
+                query += " WHERE " + " AND ".join(where_conditions)
+            
+            query += " ORDER BY ps.session_start DESC, ps.id DESC"
+            cursor.execute(query, params)
             
             results = cursor.fetchall()
             return [
@@ -417,19 +656,26 @@ class AzureSQLChunkManager:
                 for row in results
             ]
     
+    def iter_processing_sessions(self, document_id: int = None, page_size: int = 100):
+        """Yield every processing session, newest first, fetching page_size sessions at a time"""
+        before = None
+        while True:
+            sessions = self.get_processing_sessions(document_id, limit=page_size, before=before)
+            yield from sessions
+            if len(sessions) < page_size:
+                return
+            before = (sessions[-1]['session_start'], sessions[-1]['session_id'])
+    
     def get_preprocessing_stats(self, document_id: int) -> Dict:
         """Get preprocessing statistics for a document"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # Totals are maintained by add_chunks, so this is a primary-key lookup
             cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_chunks,
-                    AVG(CAST(chunk_size AS FLOAT)) as avg_chunk_size,
-                    MIN(chunk_size) as min_chunk_size,
-                    MAX(chunk_size) as max_chunk_size
-                FROM chunks 
-                WHERE document_id = ?
+                SELECT total_chunks, sum_chunk_size, min_chunk_size, max_chunk_size
+                FROM documents
+                WHERE id = ?
             """, (document_id,))
             
             result = cursor.fetchone()
@@ -437,7 +683,7 @@ class AzureSQLChunkManager:
             if result and result[0] > 0:
                 return {
                     'total_chunks': result[0],
-                    'avg_chunk_size': round(result[1], 1) if result[1] else 0,
+                    'avg_chunk_size': round(result[1] / result[0], 1),
                     'min_chunk_size': result[2],
                     'max_chunk_size': result[3]
                 }
@@ -454,21 +700,14 @@ class AzureSQLChunkManager:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Get document count
-            cursor.execute("SELECT COUNT(*) FROM documents")
-            doc_count = cursor.fetchone()[0]
-            
-            # Get preprocessing chunk count
-            cursor.execute("SELECT COUNT(*) FROM chunks")
-            chunk_count = cursor.fetchone()[0]
-            
-            # Get processing session count
-            cursor.execute("SELECT COUNT(*) FROM processing_sessions")
-            session_count = cursor.fetchone()[0]
-            
-            # Get Azure Function chunk count
-            cursor.execute("SELECT COUNT(*) FROM azure_function_chunks")
-            azure_chunk_count = cursor.fetchone()[0]
+            # All four counts in one round-trip
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM documents),
+                       (SELECT COUNT(*) FROM chunks),
+                       (SELECT COUNT(*) FROM processing_sessions),
+                       (SELECT COUNT(*) FROM azure_function_chunks)
+            """)
+            doc_count, chunk_count, session_count, azure_chunk_count = cursor.fetchone()
             
             return {
                 'documents': doc_count,
@@ -482,17 +721,16 @@ class AzureSQLChunkManager:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Delete all data (in correct order due to foreign keys)
-            cursor.execute("DELETE FROM azure_function_chunks")
+            # The chunk tables are not referenced by any foreign key, so they are truncated
+            # (page deallocation, identity reset) instead of deleted row by row
+            cursor.execute("TRUNCATE TABLE azure_function_chunks")
+            cursor.execute("TRUNCATE TABLE chunks")
+            
+            # Referenced tables cannot be truncated; delete (children first) and reset identity seeds
             cursor.execute("DELETE FROM processing_sessions")
-            cursor.execute("DELETE FROM chunks")
             cursor.execute("DELETE FROM documents")
-            
-            # Reset identity seeds
             cursor.execute("DBCC CHECKIDENT ('documents', RESEED, 0)")
-            cursor.execute("DBCC CHECKIDENT ('chunks', RESEED, 0)")
             cursor.execute("DBCC CHECKIDENT ('processing_sessions', RESEED, 0)")
-            cursor.execute("DBCC CHECKIDENT ('azure_function_chunks', RESEED, 0)")
             
             conn.commit()
 
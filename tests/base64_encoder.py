@@ -3,16 +3,38 @@ Base64 File Encoder for Postman Testing
 This script helps convert files to base64 format for testing the Azure Document Processing Function
 """
 
-import base64
+import binascii
+import io
+import mmap
 import os
 
+# SIMD base64 (SSSE3/AVX2/NEON) when installed; binascii otherwise
+try:
+    import pybase64
+    b64encode_slice = pybase64.b64encode
+except ImportError:
+    def b64encode_slice(data):
+        return binascii.b2a_base64(data, newline=False)
+
+# Bytes encoded per step; a multiple of 3 so each slice encodes without padding
+ENCODE_STEP_BYTES = 57 * 4096
+
 def encode_file_to_base64(file_path):
     """Convert a file to base64 string"""
     try:
         with open(file_path, 'rb') as file:
-            file_content = file.read()
-            base64_encoded = base64.b64encode(file_content).decode('utf-8')
-            return base64_encoded
+            if os.fstat(file.fileno()).st_size == 0:
+                return ''
+            # Encode straight from the mapped file instead of reading a full copy first
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    encoded = io.BytesIO()
+                    for start in range(0, len(view), ENCODE_STEP_BYTES):
+                        encoded.write(b64encode_slice(view[start:start + ENCODE_STEP_BYTES]))
+                    return encoded.getvalue().decode('ascii')
+                finally:
+                    view.release()
     except Exception as e:
         print(f"Error encoding file: {e}")
         return None
@@ -4,6 +4,10 @@ import sqlite3
 conn = sqlite3.connect('chunks_preprocessing.db')
 cursor = conn.cursor()
 
+# Read-only inspection: map the file into memory and allow a larger page cache
+cursor.execute('PRAGMA mmap_size = 268435456')
+cursor.execute('PRAGMA cache_size = -65536')
+
 # Check tables
 cursor.execute('SELECT name FROM sqlite_master WHERE type="table"')
 tables = cursor.fetchall()
@@ -16,26 +16,42 @@ def check_sqlite_tables():
         with sqlite3.connect(db_path) as conn:
             cursor = conn.cursor()
             
-            # Get all table names
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
+            # Read-only inspection: map the file into memory and allow a larger page cache
+            cursor.execute("PRAGMA mmap_size = 268435456")
+            cursor.execute("PRAGMA cache_size = -65536")
+            
+            # Get all table names with their columns in one query
+            cursor.execute("""
+                SELECT m.name, p.name, p.type
+                FROM sqlite_master m LEFT JOIN pragma_table_info(m.name) p
+                WHERE m.type = 'table'
+                ORDER BY m.rowid, p.cid
+            """)
+            tables = {}
+            for table_name, column_name, column_type in cursor.fetchall():
+                columns = tables.setdefault(table_name, [])
+                if column_name is not None:
+                    columns.append((column_name, column_type))
+            
+            # Get every table's row count in one query
+            counts = {}
+            if tables:
+                cursor.execute(" UNION ALL ".join(
+                    f"SELECT ?, COUNT(*) FROM \"{table_name}\"" for table_name in tables
+                ), list(tables))
+                counts = dict(cursor.fetchall())
             
             print(f"📊 Found {len(tables)} tables:")
-            for table in tables:
-                table_name = table[0]
+            for table_name, columns in tables.items():
                 print(f"  📋 {table_name}")
                 
-                # Get table schema
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = cursor.fetchall()
+                # Table schema
                 print(f"     Columns: {len(columns)}")
-                for col in columns:
-                    print(f"       - {col[1]} ({col[2]})")
+                for column_name, column_type in columns:
+                    print(f"       - {column_name} ({column_type})")
                 
-                # Get row count
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                count = cursor.fetchone()[0]
-                print(f"     Rows: {count}")
+                # Row count
+                print(f"     Rows: {counts[table_name]}")
                 print()
                 
     except Exception as e:
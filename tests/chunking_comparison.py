@@ -5,10 +5,15 @@ Comparison test script for all three chunking methods with content validation
 import sys
 import os
 import time
+import argparse
+import threading
 import requests
-import json
+import orjson
 import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
 
 # Add the parent directory to the Python path
 sys.path.append(str(Path(__file__).parent))
@@ -17,66 +22,102 @@ sys.path.append(str(Path(__file__).parent))
 from dotenv import load_dotenv
 load_dotenv(Path(__file__).parent / '.env')
 
-def test_chunking_method(method_name, display_name):
-    """Test a specific chunking method"""
+# One keep-alive session for every request; the concurrent tests each take a pooled connection
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+SESSION.headers['Connection'] = 'keep-alive'
+
+# Successful results are kept here, keyed by the PDF's sha256 and the chunking method
+CACHE_DIR = Path.home() / '.cache' / 'chunking_comparison'
+
+# Serializes each test's report so concurrent tests print whole blocks
+OUTPUT_LOCK = threading.Lock()
+
+def test_chunking_method(method_name, display_name, filename, payload_prefix=None, file_bytes=None, cache_path=None):
+    """Test a specific chunking method with a pre-serialized JSON payload (see
+    `serialize_payload_prefix`), or with the raw file bytes when `file_bytes` is given
     
+    When `cache_path` is given, a result stored there by an earlier run is returned without
+    calling the Function, and a new successful result is stored there.
+    
+    Output is collected and printed in one piece so concurrent tests do not interleave.
+    """
+    lines = []
+    try:
+        return _run_chunking_method(method_name, display_name, filename, payload_prefix, file_bytes, cache_path, lines.append)
+    finally:
+        with OUTPUT_LOCK:
+            print("\n".join(lines))
+            print()
+
+def serialize_payload_prefix(filename, file_b64):
+    """Serialize the JSON payload shared by every method, leaving the object open so only
+    `chunking_method` has to be appended per request"""
+    return orjson.dumps({
+        "filename": filename,
+        "file_content": file_b64,
+        "force_reindex": False
+    })[:-1]
+
+def _run_chunking_method(method_name, display_name, filename, payload_prefix, file_bytes, cache_path, log):
     # Azure Function URL
     function_url = os.getenv('AZURE_FUNCTION_URL', 'http://localhost:7071/api/process-document')
     
-    # PDF file path
-    pdf_path = Path(__file__).parent / 'employee.pdf'
-    
-    if not pdf_path.exists():
-        print(f"❌ PDF file not found: {pdf_path}")
-        return None
+    log(f"🧪 Testing {display_name}")
+    log("-" * 50)
     
-    print(f"🧪 Testing {display_name}")
-    print("-" * 50)
+    if cache_path is not None and cache_path.exists():
+        result = orjson.loads(cache_path.read_bytes())
+        log(f"♻️  Cached result ({result['chunks']} chunks, originally {result['processing_time']:.1f}s)")
+        return result
     
     try:
-        # Read and encode file to base64
-        with open(pdf_path, 'rb') as f:
-            file_content = base64.b64encode(f.read()).decode('utf-8')
-        
-        # Prepare JSON payload
-        payload = {
-            "filename": pdf_path.name,
-            "file_content": file_content,
-            "force_reindex": False,
-            "chunking_method": method_name
-        }
+        if file_bytes is not None:
+            # Raw upload: the PDF is the request body and the options go in the query string
+            request_args = {
+                'data': file_bytes,
+                'params': {"filename": filename, "force_reindex": "false", "chunking_method": method_name},
+                'headers': {'Content-Type': 'application/pdf'}
+            }
+        else:
+            # The base64 content was serialized once in main(); only the method differs
+            request_args = {
+                'data': payload_prefix + b',"chunking_method":' + orjson.dumps(method_name) + b'}',
+                'headers': {'Content-Type': 'application/json'}
+            }
         
-        print(f"🚀 Sending request...")
+        log(f"🚀 Sending request...")
         start_time = time.time()
         
-        # Send JSON request with timeout
-        response = requests.post(
+        # Send request with timeout
+        response = SESSION.post(
             function_url,
-            json=payload,
-            timeout=500
+            timeout=500,
+            **request_args
         )
         
         processing_time = time.time() - start_time
         
         # Check response
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             
             chunks_created = result.get('chunks_created', 0)
             enhancement = result.get('enhancement', 'none')
             validation = result.get('content_validation', {})
             
-            print(f"✅ Success! ({processing_time:.1f}s)")
-            print(f"   Chunks: {chunks_created}")
-            print(f"   Enhancement: {enhancement}")
+            log(f"✅ Success! ({processing_time:.1f}s)")
+            log(f"   Chunks: {chunks_created}")
+            log(f"   Enhancement: {enhancement}")
             
             if validation:
                 char_ratio = validation.get('char_preservation_ratio', 0)
                 word_ratio = validation.get('word_preservation_ratio', 0)
                 validation_passed = validation.get('validation_passed', False)
-                print(f"   Content Preservation: {char_ratio:.1%} chars, {word_ratio:.1%} words {'✅' if validation_passed else '⚠️'}")
+                log(f"   Content Preservation: {char_ratio:.1%} chars, {word_ratio:.1%} words {'✅' if validation_passed else '⚠️'}")
             
-            return {
+            result = {
                 'method': method_name,
                 'display_name': display_name,
                 'chunks': chunks_created,
@@ -85,9 +126,13 @@ def test_chunking_method(method_name, display_name):
                 'validation': validation,
                 'status': 'success'
             }
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                cache_path.write_bytes(orjson.dumps(result))
+            return result
             
         else:
-            print(f"❌ Failed (status {response.status_code})")
+            log(f"❌ Failed (status {response.status_code})")
             return {
                 'method': method_name,
                 'display_name': display_name,
@@ -96,14 +141,14 @@ def test_chunking_method(method_name, display_name):
             }
             
     except requests.exceptions.Timeout:
-        print(f"⏰ Timeout after 500 seconds")
+        log(f"⏰ Timeout after 500 seconds")
         return {
             'method': method_name,
             'display_name': display_name,
             'status': 'timeout'
         }
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log(f"❌ Error: {e}")
         return {
             'method': method_name,
             'display_name': display_name,
@@ -111,14 +156,36 @@ def test_chunking_method(method_name, display_name):
             'error': str(e)
         }
 
-def main():
+def main(argv=None):
     """Main comparison test"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--raw-upload', action='store_true',
+                        help="send the PDF bytes as the request body instead of base64 inside JSON "
+                             "(needs a Function version that accepts raw uploads)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"always call the Function instead of reusing results cached in {CACHE_DIR}")
+    args = parser.parse_args(argv)
+    
+    # PDF file path; the file is read (and base64-encoded for JSON uploads) once for all methods
+    pdf_path = Path(__file__).parent / 'employee.pdf'
+    
+    try:
+        pdf_bytes = pdf_path.read_bytes()
+    except FileNotFoundError:
+        print(f"❌ PDF file not found: {pdf_path}")
+        return 1
+    
     print("🔍 Chunking Methods Comparison Test")
     print("=" * 60)
-    print(f"📄 File: employee.pdf")
-    print(f"📏 Size: {(Path(__file__).parent / 'employee.pdf').stat().st_size:,} bytes")
+    print(f"📄 File: {pdf_path.name}")
+    print(f"📏 Size: {len(pdf_bytes):,} bytes")
     print()
     
+    if args.raw_upload:
+        upload = {'file_bytes': pdf_bytes}
+    else:
+        upload = {'payload_prefix': serialize_payload_prefix(pdf_path.name, base64.b64encode(pdf_bytes).decode('ascii'))}
+    
     # Test all three methods (using correct parameter values expected by Azure Function)
     methods = [
         ('intelligent', 'OpenAI Intelligent Chunking'),
@@ -126,14 +193,21 @@ def main():
         ('basic', 'Sentence-Based Basic Chunking')
     ]
     
+    # Cached results are reused only for the exact same PDF bytes
+    if args.no_cache:
+        cache_paths = {}
+    else:
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        cache_paths = {method: CACHE_DIR / f"{digest}_{method}.json" for method, _ in methods}
+    
     results = []
     
-    for method, display_name in methods:
-        result = test_chunking_method(method, display_name)
-        if result:
-            results.append(result)
-        print()
-        time.sleep(2)  # Brief pause between tests
+    # The methods are independent requests, so run them concurrently: the total wait is the
+    # slowest method rather than the sum of all three
+    with SESSION, ThreadPoolExecutor(max_workers=len(methods)) as executor:
+        for result in executor.map(lambda method: test_chunking_method(*method, pdf_path.name, cache_path=cache_paths.get(method[0]), **upload), methods):
+            if result:
+                results.append(result)
     
     # Summary
     print("📊 COMPARISON SUMMARY")
@@ -132,10 +132,11 @@ class ChunkDatabaseManager:
         file_hash = self.calculate_file_hash(file_content)
         file_size = len(file_content)
         
-        # Create content preview (first 200 chars of decoded content)
+        # Create content preview (first 200 chars of decoded content); 1024 bytes cover
+        # 200 characters even at 4 bytes each, so the rest of the file is never decoded
         try:
-            content_preview = file_content.decode('utf-8', errors='ignore')[:200] + '...'
-        except:
+            content_preview = file_content[:1024].decode('utf-8', errors='ignore')[:200] + '...'
+        except Exception:
             content_preview = f"Binary file ({file_size} bytes)"
         
         with sqlite3.connect(self.db_path) as conn:
@@ -207,7 +207,11 @@ class MultiDatabaseAzureFunctionTester(AzureFunctionTester):
                 elif choice == "3":
                     try:
                         if hasattr(self.db, 'get_processing_sessions'):
-                            sessions = self.db.get_processing_sessions()
+                            # Azure SQL returns one page per call; page through the full history
+                            if hasattr(self.db, 'iter_processing_sessions'):
+                                sessions = list(self.db.iter_processing_sessions())
+                            else:
+                                sessions = self.db.get_processing_sessions()
                             if sessions:
                                 print(f"\n🔄 PROCESSING SESSIONS ({len(sessions)} total):")
                                 print("-" * 60)
@@ -17,8 +17,34 @@ Usage:
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+def check_chunk_ids_align(db, doc_id, session_id, chunk_ids, test_chunks):
+    """Verify returned chunk IDs line up with chunk indexes, also for concurrent inserts"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, chunk_index FROM chunks WHERE document_id = ?", (doc_id,))
+        indexes = dict(cursor.fetchall())
+    assert [indexes[chunk_id] for chunk_id in chunk_ids] == list(range(len(test_chunks))), \
+        "add_chunks IDs do not match chunk indexes"
+    
+    # Two concurrent batches for the same session must each get back only their own rows
+    batches = [
+        [{"content": f"Concurrent batch {batch} chunk {i}", "index": i} for i in range(50)]
+        for batch in ("A", "B")
+    ]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        id_lists = list(executor.map(lambda batch: db.add_azure_function_chunks(session_id, doc_id, batch), batches))
+    
+    stored = {chunk['chunk_id']: chunk for chunk in db.iter_azure_function_chunks(session_id=session_id, include_content=True)}
+    for batch, ids in zip(batches, id_lists):
+        assert len(ids) == len(batch), "add_azure_function_chunks returned the wrong number of IDs"
+        for chunk_data, chunk_id in zip(batch, ids):
+            row = stored[chunk_id]
+            assert (row['azure_chunk_index'], row['azure_chunk_content']) == (chunk_data['index'], chunk_data['content']), \
+                f"Azure chunk ID {chunk_id} belongs to a different chunk"
+
 def test_azure_sql():
     """Test Azure SQL chunk manager functionality"""
     
@@ -96,11 +122,15 @@ def test_azure_sql():
         azure_chunk_ids = db.add_azure_function_chunks(session_id, doc_id, azure_chunks)
         print(f"☁️ Azure Function chunks added: {len(azure_chunk_ids)} chunks")
         
-        # Update chunk status
-        for i, (chunk_data, chunk_id) in enumerate(zip(azure_chunks, azure_chunk_ids)):
-            status = chunk_data.get('status', 'pending')
-            error = chunk_data.get('error')
-            db.update_azure_chunk_status(chunk_id, status, error_message=error)
+        # Check that returned IDs line up with their chunks
+        check_chunk_ids_align(db, doc_id, session_id, chunk_ids, test_chunks)
+        print("🔢 Chunk IDs line up with chunk indexes (including concurrent inserts)")
+        
+        # Update chunk status (one batch for all chunks)
+        db.update_azure_chunk_status_many([
+            (chunk_id, chunk_data.get('status', 'pending'), chunk_data.get('error'), None, None)
+            for chunk_data, chunk_id in zip(azure_chunks, azure_chunk_ids)
+        ])
         print("📝 Chunk statuses updated")
         
         # End processing session
@@ -119,7 +149,7 @@ def test_azure_sql():
         print(f"❌ Found {len(failed_chunks)} failed chunks")
         
         # Get processing sessions
-        sessions = db.get_processing_sessions(document_id=doc_id)
+        sessions = list(db.iter_processing_sessions(document_id=doc_id))
         print(f"📋 Found {len(sessions)} processing sessions")
         
         # Get final stats